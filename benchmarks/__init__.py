@@ -0,0 +1,2 @@
+# Performance benchmarks, run them with 'python -m benchmarks' from the project root.
+# They don't need network access, GitHub is replaced by a local stand-in server.
@@ -0,0 +1,178 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from validator.cache import fetch_text
+from validator.compatibility import CompatibilityIndex, CompatibilityMatrix, builds_of
+from validator.exclusions import ExclusionMatcher
+from validator.ksp_version import KspVersion
+from validator.validator import find_version_files, parse_latest_ksp_version, validate_cwd, validate_list
+from validator.versionfile import VersionFile, compile_schema
+from .server import StandInServer
+from .workspace import create_served_files, create_workspace
+
+REPOSITORY_ROOT = Path(__file__).parent.parent
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description='Measures the performance of the validator on a synthetic repository.')
+    parser.add_argument('--files', type=int, default=150, help='number of version files to validate')
+    parser.add_argument('--excluded', type=int, default=20, help='number of version files to exclude')
+    parser.add_argument('--depth', type=int, default=4, help='depth of the asset tree of each mod')
+    parser.add_argument('--assets', type=int, default=20, help='number of asset files per directory')
+    parser.add_argument('--builds', type=int, default=300, help='number of entries in the build map')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds the stand-in server waits per request')
+    parser.add_argument('--concurrency', type=int, default=4, help='number of parallel remote downloads')
+    parser.add_argument('--processes', type=int, default=2, help='number of processes for the multi-process run')
+    parser.add_argument('--repeat', type=int, default=5, help='how often to run each benchmark')
+    parser.add_argument('--output', type=Path, help='write the JSON results to this file instead of stdout')
+    args = parser.parse_args()
+
+    # The validator logs a lot, which would mess up the output. Not part of what's measured here.
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        served = Path(tmp, 'served')
+        workspace = Path(tmp, 'workspace')
+        create_served_files(served, args.builds)
+        with StandInServer(served, args.latency) as server:
+            exclusions = create_workspace(workspace, served, server.url,
+                                          args.files, args.excluded, args.depth, args.assets)
+            old_cwd = os.getcwd()
+            os.chdir(workspace)
+            try:
+                results = run_benchmarks(server.url, json.dumps(exclusions), args, Path(tmp))
+            finally:
+                os.chdir(old_cwd)
+
+    report = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {k: v for k, v in vars(args).items() if k != 'output'},
+        'benchmarks': results
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output + '\n')
+    else:
+        print(output)
+
+
+def run_benchmarks(base_url: str, exclude: str, args, tmp: Path) -> dict:
+    results = {}
+
+    # Interpreter startup alone, and with importing the validator, which shouldn't import much more.
+    results['startup_python'] = measure(lambda: subprocess.run([sys.executable, '-c', 'pass'], check=True),
+                                        args.repeat)
+    results['startup_import_main'] = measure(
+        lambda: subprocess.run([sys.executable, '-c', 'import main'], cwd=REPOSITORY_ROOT, check=True), args.repeat)
+
+    results['fetch_schema'] = measure(lambda: json.loads(fetch_text(f'{base_url}/schema.json')), args.repeat)
+    results['fetch_latest_ksp'] = measure(lambda: parse_latest_ksp_version(fetch_text(f'{base_url}/builds.json')),
+                                          args.repeat)
+    schema = json.loads(fetch_text(f'{base_url}/schema.json'))
+    build_map = json.loads(fetch_text(f'{base_url}/builds.json'))
+
+    matcher = ExclusionMatcher.from_json(exclude)
+    results['discovery'] = measure(
+        lambda: [f for f in find_version_files(skip_dir=matcher.excludes_subtree) if not matcher.matches(f)],
+        args.repeat)
+
+    files = sorted(find_version_files())
+    contents = [(f, f.read_text()) for f in files]
+    results['version_file_init'] = measure(lambda: [VersionFile(c, f) for (f, c) in contents], args.repeat,
+                                           items=len(contents))
+    results['version_file_init_positions'] = measure(
+        lambda: [VersionFile(c, f, positions=True) for (f, c) in contents], args.repeat, items=len(contents))
+
+    schema_validator = compile_schema(schema)
+
+    def validate_all(version_files):
+        for version_file in version_files:
+            version_file.validate(schema_validator)
+    # Validation results are remembered per instance, so every run needs new ones.
+    results['version_file_validate'] = measure(validate_all, args.repeat, items=len(contents),
+                                               setup=lambda: [VersionFile(c, f) for (f, c) in contents])
+
+    version_strings = [f'1.{i % 13}.{i % 7}' + (f'.{i}' if i % 2 else '') for i in range(max(len(files), 1000))]
+    results['ksp_version_parse'] = measure(lambda: [KspVersion(v) for v in version_strings], args.repeat,
+                                           items=len(version_strings))
+    versions = [KspVersion(v) for v in version_strings]
+    vmin, vmax = KspVersion('1.4'), KspVersion('1.9.9')
+    results['ksp_version_compare'] = measure(
+        lambda: (sorted(versions), [v.is_contained_in(None, vmin, vmax) for v in versions]),
+        args.repeat, items=len(versions))
+    results['ksp_version_sort_key_and_hash'] = measure(
+        lambda: (sorted(versions, key=lambda v: v.sort_key), set(versions)), args.repeat, items=len(versions))
+
+    version_files = [VersionFile(c, f) for (f, c) in contents]
+    builds = builds_of(build_map)
+    results['compatibility_matrix'] = measure(lambda: CompatibilityMatrix(version_files, builds), args.repeat,
+                                              items=len(version_files) * len(builds))
+    index = CompatibilityIndex(version_files)
+    results['compatibility_index'] = measure(lambda: [index.compatible_with(v) for v in builds.values()],
+                                             args.repeat, items=len(builds))
+    results['compatibility_linear_scan'] = measure(
+        lambda: [[vf for vf in version_files if vf.is_compatible_with_ksp(v)] for v in builds.values()],
+        args.repeat, items=len(builds))
+
+    results['validate_list'] = measure(
+        lambda: validate_list([str(f) for f in files], schema, build_map, max_workers=args.concurrency),
+        args.repeat, items=len(files))
+    results['validate_cwd'] = measure(
+        lambda: validate_cwd(exclude, schema, build_map, max_workers=args.concurrency),
+        args.repeat, items=len(files))
+
+    results['validate_cwd_processes'] = measure(
+        lambda: validate_cwd(exclude, schema, build_map, max_workers=args.concurrency, processes=args.processes),
+        args.repeat, items=len(files))
+
+    manifest_path = tmp / 'incremental.json'
+    validate_cwd(exclude, schema, build_map, max_workers=args.concurrency, manifest_path=manifest_path)
+    results['validate_cwd_incremental_unchanged'] = measure(
+        lambda: validate_cwd(exclude, schema, build_map, max_workers=args.concurrency, manifest_path=manifest_path),
+        args.repeat, items=len(files))
+
+    return results
+
+
+def measure(func, repeat: int, items: int = None, setup=None) -> dict:
+    """Runs func repeat times and returns statistics of the wall times in seconds.
+
+    :param func: The function to measure. Gets the return value of setup as argument, if given.
+    :param repeat: How often to run func.
+    :param items: The number of items processed by each run, to calculate the time per item.
+    :param setup: Called before every run of func, not included in the measurement.
+    """
+    times = []
+    for _ in range(max(1, repeat)):
+        args = (setup(),) if setup else ()
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    result = {
+        'runs': len(times),
+        'min': min(times),
+        'median': statistics.median(times),
+        'mean': statistics.mean(times),
+        'max': max(times)
+    }
+    if items:
+        result['items'] = items
+        result['median_per_item'] = result['median'] / items
+    return result
+
+
+if __name__ == '__main__':
+    main()
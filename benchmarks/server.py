@@ -0,0 +1,41 @@
+import functools
+import http.server
+import threading
+import time
+from pathlib import Path
+
+
+class StandInServer:
+    """Serves the files of a local directory over HTTP in a background thread, in place of GitHub.
+
+    Use it as context manager. The optional latency is added to every request to simulate a remote host.
+    """
+
+    def __init__(self, directory: Path, latency: float = 0.0):
+        handler = functools.partial(_Handler, directory=str(directory), latency=latency)
+        self._server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self._server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self._server.server_port}'
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class _Handler(http.server.SimpleHTTPRequestHandler):
+
+    def __init__(self, *args, latency=0.0, **kwargs):
+        self.latency = latency
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
@@ -0,0 +1,84 @@
+import json
+import shutil
+from pathlib import Path
+from typing import List
+
+STAND_IN_SCHEMA = Path(__file__).parent / 'schema.json'
+
+
+def create_served_files(served: Path, builds: int):
+    """Creates the files the stand-in server provides in place of GitHub: schema.json and builds.json.
+
+    :param served: The directory served by the stand-in server.
+    :param builds: The number of entries in the build map.
+    """
+    served.mkdir(parents=True, exist_ok=True)
+    shutil.copy(STAND_IN_SCHEMA, served / 'schema.json')
+    build_map = {'builds': {str(1000 + i): f'1.{i // 100}.{i % 100 // 10}.{1000 + i}' for i in range(builds)}}
+    (served / 'builds.json').write_text(json.dumps(build_map, indent=4))
+
+
+def create_workspace(workspace: Path, served: Path, base_url: str,
+                     files: int, excluded: int, depth: int, assets: int) -> List[str]:
+    """Creates a synthetic mod repository, and the remote version files its version files point to.
+
+    Every mod has its own version file and a directory tree of fake textures. Every fifth version file points to the
+    same shared remote, like bundled libraries do. The excluded mods are meant to be excluded via the returned patterns.
+
+    :param workspace: The directory to create the repository in.
+    :param served: The directory served by the stand-in server, the remote version files are put into 'remotes/'.
+    :param base_url: The URL of the stand-in server.
+    :param files: The number of version files to validate.
+    :param excluded: The number of version files to exclude.
+    :param depth: The depth of each asset tree.
+    :param assets: The number of asset files in each directory of the asset trees.
+    :return: The exclusion patterns, in the format of the 'exclude' input.
+    """
+    remotes = served / 'remotes'
+    remotes.mkdir(parents=True, exist_ok=True)
+    (remotes / 'Shared.version').write_text(json.dumps(_version_file('Shared', None, 3)))
+
+    for i in range(files):
+        name = f'Mod{i:05d}'
+        remote_name = 'Shared' if i % 5 == 0 else name
+        if remote_name != 'Shared':
+            (remotes / f'{name}.version').write_text(json.dumps(_version_file(name, None, i)))
+        _create_mod(workspace / 'GameData' / name, _version_file(name, f'{base_url}/remotes/{remote_name}.version', i),
+                    depth, assets)
+
+    for i in range(excluded):
+        name = f'Bundled{i:05d}'
+        _create_mod(workspace / 'GameData' / 'Bundled' / name, _version_file(name, None, i), depth, assets)
+
+    # A bit of VCS metadata, which should never be searched.
+    for i in range(100):
+        objects = workspace / '.git' / 'objects' / f'{i:02x}'
+        objects.mkdir(parents=True, exist_ok=True)
+        (objects / f'{i:038x}').touch()
+
+    return ['GameData/Bundled/**/*', 'GameData/Mod00000/*.version', 'README.version']
+
+
+def _create_mod(directory: Path, content: dict, depth: int, assets: int):
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / f'{directory.name}.version').write_text(json.dumps(content, indent=2))
+    asset_dir = directory
+    for d in range(depth):
+        asset_dir = asset_dir / f'Textures{d}'
+        asset_dir.mkdir()
+        for a in range(assets):
+            (asset_dir / f'texture{a}.dds').touch()
+
+
+def _version_file(name: str, url, i: int) -> dict:
+    content = {
+        'NAME': name,
+        'DOWNLOAD': f'https://github.com/Someone/{name}/releases',
+        'GITHUB': {'USERNAME': 'Someone', 'REPOSITORY': name},
+        'VERSION': {'MAJOR': 1, 'MINOR': i % 10, 'PATCH': i % 7, 'BUILD': i},
+        'KSP_VERSION_MIN': '1.8.0',
+        'KSP_VERSION_MAX': f'1.{8 + i % 5}.9'
+    }
+    if url:
+        content['URL'] = url
+    return content
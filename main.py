@@ -1,45 +1,169 @@
 #!/usr/bin/env python3
+import logging as log
 import os
 import sys
+from pathlib import Path
 
+from validator.batch import validate_repositories
+from validator.cache import setup_cache, DEFAULT_REMOTE_MAX_ENTRIES, DEFAULT_REMOTE_TTL
+from validator.http import setup_http, DEFAULT_RETRIES, DEFAULT_TIMEOUT
 from validator.utils import get_env_array, str_to_bool
 from validator.logger import setup_logger
-from validator.validator import validate_cwd, validate_list
+from validator.results import setup_results, write_results, RESULT_FORMATS
+from validator.timing import setup_timing, write_reports
+from validator.exclusions import ExclusionMatcher
+from validator.ksp_version import KspVersion
+from validator.validator import validate_cwd, validate_list, git_changed_version_files, DEFAULT_MAX_WORKERS
 
 
 def main():
+    debug = str_to_bool(os.getenv('INPUT_DEBUG', 'false'))
+    setup_logger(debug, max_annotations=int(os.getenv('INPUT_MAX_ANNOTATIONS') or 0))
+    setup_http(float(os.getenv('INPUT_TIMEOUT') or DEFAULT_TIMEOUT), int(os.getenv('INPUT_RETRIES') or DEFAULT_RETRIES),
+               get_concurrency(), os.getenv('INPUT_MIRROR', ''))
+    setup_cache(os.getenv('INPUT_CACHE_DIR', ''), get_offline(),
+                int(os.getenv('INPUT_REMOTE_CACHE_TTL') or DEFAULT_REMOTE_TTL),
+                int(os.getenv('INPUT_REMOTE_CACHE_SIZE') or DEFAULT_REMOTE_MAX_ENTRIES))
+    setup_timing(bool(os.getenv('INPUT_TIMING_REPORT')) or str_to_bool(os.getenv('INPUT_TIMING_SUMMARY') or 'false'))
+    if os.getenv('INPUT_RESULTS_FILE'):
+        # Complain about an unknown format before the run, not after it.
+        get_results_format()
+        setup_results()
+
     if len(sys.argv) > 1:
         # Assume the provided arguments are a list of files to check.
         argv_whitelist = sys.argv[1:]
         validate_list_of_files(argv_whitelist)
+    elif repositories := get_env_array('INPUT_REPOSITORIES'):
+        # Check many repositories one after another, sharing the schema and the latest KSP version
+        validate_repositories_in_batch(repositories)
     elif env_whitelist := get_env_array('INPUT_ONLY'):
         # We got a whitelist of files to check via env var
         validate_list_of_files(env_whitelist)
+    elif base_ref := os.getenv('INPUT_BASE_REF'):
+        # Only check the files that changed since the given git revision
+        validate_changed_files(base_ref)
     else:
         # Else go the normal route and check everything in the cwd.
         validate_current_repository()
 
 
 def validate_current_repository():
-    debug = str_to_bool(os.getenv('INPUT_DEBUG', 'false'))
-    setup_logger(debug)
-
     exclude = os.getenv('INPUT_EXCLUDE', '')
+    use_git = str_to_bool(os.getenv('INPUT_USE_GIT') or 'false')
 
-    (status, successful, failed, ignored) = validate_cwd(exclude)
-    print(f'Exiting with status {status}: {len(successful)} successful, {len(failed)} failed, {len(ignored)} ignored.')
-    exit(status)
+    (status, successful, failed, ignored) = validate_cwd(exclude, max_workers=get_concurrency(), use_git=use_git,
+                                                         manifest_path=get_manifest_path(),
+                                                         latest_ksp=get_latest_ksp(), processes=get_processes(),
+                                                         all_errors=get_all_errors())
+    finish(status, successful, failed, ignored)
+
+
+def validate_changed_files(base_ref):
+    matcher = ExclusionMatcher.from_json(os.getenv('INPUT_EXCLUDE', ''))
+    changed_files = git_changed_version_files(base_ref, matcher)
+    if changed_files is None:
+        log.warning(f'Could not determine the files changed since {base_ref}, validating all files instead. '
+                    f'Make sure git is installed and the history of {base_ref} is checked out.')
+        validate_current_repository()
+        return
+
+    validate_list_of_files([str(f) for f in sorted(changed_files) if not matcher.matches(f)])
 
 
 def validate_list_of_files(file_list):
-    debug = str_to_bool(os.getenv('INPUT_DEBUG', 'false'))
-    setup_logger(debug)
+    (status, successful, failed, ignored) = validate_list(file_list, max_workers=get_concurrency(),
+                                                          manifest_path=get_manifest_path(),
+                                                          latest_ksp=get_latest_ksp(), processes=get_processes(),
+                                                          all_errors=get_all_errors())
+    finish(status, successful, failed, ignored)
+
+
+def validate_repositories_in_batch(roots):
+    results_file = os.getenv('INPUT_RESULTS_FILE')
+
+    def on_done(root, result):
+        (status, successful, failed, ignored) = result
+        print(f'{root}: status {status}: {len(successful)} successful, {len(failed)} failed, {len(ignored)} ignored.')
+        if results_file:
+            # Relative to the repository, which is the working directory right now.
+            write_results(Path(results_file), get_results_format(), *result)
+            setup_results()
+
+    results = validate_repositories(roots, os.getenv('INPUT_EXCLUDE', ''), max_workers=get_concurrency(),
+                                    use_git=str_to_bool(os.getenv('INPUT_USE_GIT') or 'false'),
+                                    latest_ksp=get_latest_ksp(), processes=get_processes(),
+                                    all_errors=get_all_errors(), on_done=on_done)
+    write_timing_reports()
+
+    status = max((result[0] for result in results.values()), default=0)
+    failed_roots = [root for (root, result) in results.items() if result[0] != 0]
+    print(f'Exiting with status {status}: {len(results) - len(failed_roots)} repositories successful, '
+          f'{len(failed_roots)} failed {failed_roots}.')
+    exit(status)
 
-    (status, successful, failed, ignored) = validate_list(file_list)
+
+def finish(status, successful, failed, ignored):
+    write_timing_reports()
+    if results_file := os.getenv('INPUT_RESULTS_FILE'):
+        write_results(Path(results_file), get_results_format(), status, successful, failed, ignored)
 
     print(f'Exiting with status {status}: {len(successful)} successful, {len(failed)} failed, {len(ignored)} ignored.')
     exit(status)
 
 
+def write_timing_reports():
+    report = os.getenv('INPUT_TIMING_REPORT')
+    summary = os.getenv('GITHUB_STEP_SUMMARY') if str_to_bool(os.getenv('INPUT_TIMING_SUMMARY') or 'false') else None
+    write_reports(Path(report) if report else None, Path(summary) if summary else None)
+
+
+def get_concurrency():
+    return int(os.getenv('INPUT_CONCURRENCY') or DEFAULT_MAX_WORKERS)
+
+
+def get_processes():
+    return int(os.getenv('INPUT_PROCESSES') or 1)
+
+
+def get_all_errors():
+    return str_to_bool(os.getenv('INPUT_ALL_ERRORS') or 'false')
+
+
+def get_offline():
+    offline = str_to_bool(os.getenv('INPUT_OFFLINE') or 'false')
+    if offline and not os.getenv('INPUT_CACHE_DIR'):
+        log.error('The offline mode requires a cache_dir.')
+        exit(1)
+    return offline
+
+
+def get_manifest_path():
+    if not str_to_bool(os.getenv('INPUT_INCREMENTAL') or 'false'):
+        return None
+    cache_dir = os.getenv('INPUT_CACHE_DIR')
+    if not cache_dir:
+        log.error('The incremental mode requires a cache_dir.')
+        exit(1)
+    return Path(cache_dir) / 'incremental.json'
+
+
+def get_results_format():
+    result_format = os.getenv('INPUT_RESULTS_FORMAT') or 'jsonl'
+    if result_format not in RESULT_FORMATS:
+        log.error(f'Unknown results_format {result_format}, use one of {", ".join(RESULT_FORMATS)}.')
+        exit(1)
+    return result_format
+
+
+def get_latest_ksp():
+    if version := os.getenv('INPUT_LATEST_KSP_VERSION'):
+        if (latest_ksp := KspVersion.try_parse(version)) is None:
+            log.error(f'Invalid latest_ksp_version {version}, use a KSP version like 1.12.5.')
+            exit(1)
+        return latest_ksp
+    return None
+
+
 if __name__ == "__main__":
     main()
@@ -1,8 +1,21 @@
 from validator.logger import setup_logger
+from .batch import *
+from .cache import *
+from .compatibility import *
 from .default import *
+from .discovery import *
+from .exclusions import *
+from .http_session import *
+from .incremental import *
 from .ksp_version import *
+from .logger import *
+from .mirror import *
+from .positions import *
+from .results import *
 from .singlefiles import *
+from .startup import *
 from .strangenames import *
+from .timing import *
 from .utils import *
 from .versionfile import *
 
@@ -0,0 +1,60 @@
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from validator import cache
+from validator.batch import validate_repositories
+from validator.versionfile import compile_schema
+from .test_utils import schema, build_map
+
+
+class TestBatch(TestCase):
+    roots = ['./tests/workspaces/default', './tests/workspaces/strange-names']
+
+    def test_perRepository(self):
+        old_cwd = os.getcwd()
+        results = validate_repositories(self.roots, '"failing/failing-validation.version"', schema, build_map)
+        self.assertEqual(os.getcwd(), old_cwd)
+
+        (status, successful, failed, ignored) = results['./tests/workspaces/default']
+        self.assertEqual(status, 0)
+        self.assertSetEqual(ignored, {Path('failing/failing-validation.version')})
+
+        (status, successful, failed, ignored) = results['./tests/workspaces/strange-names']
+        self.assertEqual(status, 1)
+        self.assertSetEqual(successful, {Path('CAPS.VERSION')})
+        self.assertSetEqual(failed, {Path('camelCaseVersionMissing.Version')})
+
+    def test_missingRepository(self):
+        results = validate_repositories(['./tests/workspaces/does-not-exist'] + self.roots, '', schema, build_map)
+        self.assertEqual(results['./tests/workspaces/does-not-exist'], (1, set(), set(), set()))
+        self.assertEqual(results['./tests/workspaces/strange-names'][0], 1)
+
+    def test_onDoneInRepository(self):
+        seen = []
+        validate_repositories(self.roots, '', schema, build_map,
+                              on_done=lambda root, result: seen.append((root, Path.cwd().name)))
+        self.assertEqual(seen, [('./tests/workspaces/default', 'default'),
+                                ('./tests/workspaces/strange-names', 'strange-names')])
+
+    def test_compiledSchema(self):
+        schema_validator = compile_schema(schema)
+        self.assertIs(compile_schema(schema_validator), schema_validator)
+        results = validate_repositories(self.roots, '', schema_validator, build_map)
+        self.assertEqual(results['./tests/workspaces/default'][0], 1)
+
+    def test_relativeCacheDir(self):
+        roots = [str(Path(root).resolve()) for root in self.roots]
+        old_cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                cache.setup_cache('.avc-cache')
+                validate_repositories(roots, '', schema, build_map)
+            finally:
+                cache.setup_cache(None)
+                os.chdir(old_cwd)
+            # Where the run started, not in the repositories.
+            self.assertTrue(Path(tmp, '.avc-cache', 'remotes.json').is_file())
+        self.assertFalse(any(Path(root, '.avc-cache').exists() for root in roots))
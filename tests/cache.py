@@ -0,0 +1,188 @@
+import json
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import jsonschema
+
+from validator import cache as validator_cache
+from validator.cache import DownloadCache, OfflineCacheMiss, RemoteResultCache
+from validator.ksp_version import KspVersion
+from validator.utils import hash_json
+from validator.versionfile import compile_schema, download_version_file
+from .test_utils import QuietHandler, ServedDirectory, schema
+
+
+class _RecordingHandler(QuietHandler):
+    statuses = []
+
+    def send_response(self, code, message=None):
+        self.statuses.append(code)
+        super().send_response(code, message)
+
+
+class _UnconditionalHandler(_RecordingHandler):
+    # Like a server that doesn't support conditional requests.
+
+    def do_GET(self):
+        del self.headers['If-Modified-Since']
+        super().do_GET()
+
+
+class _CountingValidator:
+
+    def __init__(self, schema_dict):
+        self.schema = schema_dict
+        self.validated = 0
+        self._validator = compile_schema(schema_dict)
+
+    def iter_errors(self, instance):
+        self.validated += 1
+        return self._validator.iter_errors(instance)
+
+
+class TestDownloadCache(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.served = ServedDirectory(_RecordingHandler)
+        Path(cls.served.path, 'file.json').write_text('{"a": 1}')
+        cls.url = cls.served.url('file.json')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.served.close()
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        _RecordingHandler.statuses.clear()
+
+    def tearDown(self):
+        self.cache_dir.cleanup()
+
+    def test_revalidates(self):
+        cache = DownloadCache(Path(self.cache_dir.name))
+        self.assertEqual(cache.fetch(self.url), '{"a": 1}')
+        self.assertEqual(cache.fetch(self.url), '{"a": 1}')
+        self.assertEqual(_RecordingHandler.statuses, [200, 304])
+
+    def test_offline(self):
+        DownloadCache(Path(self.cache_dir.name)).fetch(self.url)
+        offline_cache = DownloadCache(Path(self.cache_dir.name), offline=True)
+        self.assertEqual(offline_cache.fetch(self.url), '{"a": 1}')
+        self.assertEqual(_RecordingHandler.statuses, [200])
+
+    def test_offline_miss(self):
+        cache = DownloadCache(Path(self.cache_dir.name), offline=True)
+        with self.assertRaises(OfflineCacheMiss):
+            cache.fetch(self.url)
+        self.assertEqual(_RecordingHandler.statuses, [])
+
+    def test_offline_remote(self):
+        validator_cache.setup_cache(self.cache_dir.name, offline=True, remote_ttl=0)
+        try:
+            with self.assertRaises(OfflineCacheMiss):
+                download_version_file(self.url, Path('local.version'))
+        finally:
+            validator_cache.setup_cache(None)
+        self.assertEqual(_RecordingHandler.statuses, [])
+
+
+class TestRemoteResultCache(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        served = ServedDirectory(_RecordingHandler)
+        Path(served.path, 'valid.version').write_text(
+            json.dumps({'NAME': 'Test', 'VERSION': '1.0', 'KSP_VERSION_MIN': '1.8', 'KSP_VERSION_MAX': '1.12'}))
+        Path(served.path, 'invalid.version').write_text(
+            json.dumps({'NAME': 5, 'VERSION': '1.0', 'KSP_VERSION': '*'}))
+        # The same files, from a server that doesn't support conditional requests.
+        cls.servers = {_RecordingHandler: served,
+                       _UnconditionalHandler: ServedDirectory(_UnconditionalHandler, served.path)}
+
+    @classmethod
+    def tearDownClass(cls):
+        # The one that owns the directory last.
+        cls.servers[_UnconditionalHandler].close()
+        cls.servers[_RecordingHandler].close()
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.cache_dir.name, 'remotes.json')
+        self.validator = _CountingValidator(schema)
+        _RecordingHandler.statuses.clear()
+
+    def tearDown(self):
+        self.cache_dir.cleanup()
+
+    def url(self, name: str, handler_class=_RecordingHandler) -> str:
+        return self.servers[handler_class].url(name)
+
+    def run_twice(self, url: str, schema_validator=None, **kwargs):
+        # Like two runs, each with its own cache read from disk.
+        version_files = []
+        for _ in range(2):
+            cache = RemoteResultCache(self.path, **kwargs)
+            validator = schema_validator or self.validator
+            version_files.append(cache.fetch(url, Path('local.version'), validator, hash_json(validator.schema)))
+            cache.save()
+        return version_files
+
+    def test_notModified(self):
+        (first, second) = self.run_twice(self.url('valid.version'))
+        self.assertEqual(_RecordingHandler.statuses, [200, 304])
+        self.assertEqual(self.validator.validated, 1)
+        second.validate(self.validator)
+        self.assertEqual(second.ksp_version_min, first.ksp_version_min)
+        self.assertTrue(second.is_compatible_with_ksp(KspVersion('1.10.1')))
+
+    def test_invalidRemembered(self):
+        (first, second) = self.run_twice(self.url('invalid.version'))
+        self.assertEqual(self.validator.validated, 1)
+        errors = []
+        for version_file in (first, second):
+            with self.assertRaises(jsonschema.ValidationError) as raised:
+                version_file.validate(self.validator)
+            errors.append((str(raised.exception), list(raised.exception.absolute_path),
+                           [(str(e), list(e.absolute_path), list(e.absolute_schema_path))
+                            for e in version_file.validation_errors]))
+        self.assertEqual(errors[0], errors[1])
+        self.assertEqual(len(errors[1][2]), 2)
+
+    def test_unchangedBody(self):
+        self.run_twice(self.url('valid.version', _UnconditionalHandler))
+        self.assertEqual(_RecordingHandler.statuses, [200, 200])
+        self.assertEqual(self.validator.validated, 1)
+
+    def test_otherSchema(self):
+        url = self.url('valid.version')
+        self.run_twice(url)
+        other_validator = _CountingValidator(dict(schema, title='Other'))
+        self.run_twice(url, other_validator)
+        self.assertEqual((self.validator.validated, other_validator.validated), (1, 1))
+
+    def test_expired(self):
+        self.run_twice(self.url('valid.version'), ttl=0)
+        self.assertEqual(_RecordingHandler.statuses, [200, 200])
+        self.assertEqual(self.validator.validated, 2)
+        self.assertEqual(json.loads(self.path.read_text())['entries'], {})
+
+    def test_offline(self):
+        url = self.url('valid.version')
+        self.run_twice(url)
+        _RecordingHandler.statuses.clear()
+        cache = RemoteResultCache(self.path, ttl=0, offline=True)
+        version_file = cache.fetch(url, Path('local.version'), self.validator, hash_json(schema))
+        self.assertTrue(version_file.is_compatible_with_ksp(KspVersion('1.10.1')))
+        with self.assertRaises(OfflineCacheMiss):
+            cache.fetch(self.url('invalid.version'), Path('local.version'), self.validator, hash_json(schema))
+        self.assertEqual(_RecordingHandler.statuses, [])
+        self.assertEqual(self.validator.validated, 1)
+
+    def test_leastRecentlyUsedEvicted(self):
+        cache = RemoteResultCache(self.path, max_entries=1)
+        for name in ('invalid.version', 'valid.version'):
+            cache.fetch(self.url(name), Path('local.version'), self.validator, hash_json(schema))
+        cache.save()
+        self.assertEqual(list(json.loads(self.path.read_text())['entries']), [self.url('valid.version')])
@@ -0,0 +1,102 @@
+import itertools
+import json
+from pathlib import Path
+from unittest import TestCase
+
+from validator.compatibility import CompatibilityIndex, CompatibilityMatrix, builds_of
+from validator.ksp_version import KspVersion
+from validator.versionfile import VersionFile
+
+
+def _version_file(**ksp_versions) -> VersionFile:
+    return VersionFile(json.dumps(ksp_versions), Path(f'{"-".join(ksp_versions.values()) or "none"}.version'))
+
+
+def _version_files(versions) -> list:
+    return [
+        _version_file(**{k: v for (k, v) in (('KSP_VERSION', ksp), ('KSP_VERSION_MIN', vmin),
+                                              ('KSP_VERSION_MAX', vmax)) if v is not None})
+        for (ksp, vmin, vmax) in itertools.product(versions, repeat=3)
+    ]
+
+
+class TestCompatibilityMatrix(TestCase):
+    # Include shorter versions and zero PATCHes, which are equal to more than one build.
+    build_map = {'builds': {
+        '1': '0.7.3', '2': '1.8', '3': '1.8.0.2686', '4': '1.8.1.2694', '5': '1.8.2', '6': '1.8.5.3000',
+        '7': '1.9.0.2781', '8': '1.9.1.2788', '9': '1.10.1.2939', '10': '1.12.5.3190', '11': 'malformed'
+    }}
+
+    def test_sameAsIsCompatibleWithKsp(self):
+        builds = builds_of(self.build_map)
+        versions = [None, 'any', '1.8', '1.8.0', '1.8.1', '1.8.5', '1.8.1.2694', '1.9.1.9999', '1.11', '2.0']
+        version_files = _version_files(versions)
+        matrix = CompatibilityMatrix(version_files, builds)
+
+        for (i, version_file) in enumerate(version_files):
+            for (j, build_id) in enumerate(matrix.build_ids):
+                self.assertEqual(matrix.is_compatible(i, j), version_file.is_compatible_with_ksp(builds[build_id]),
+                                 f'{version_file.json} with {builds[build_id]}')
+
+    def test_columnsSorted(self):
+        matrix = CompatibilityMatrix([], builds_of(self.build_map))
+        self.assertEqual(matrix.build_ids, ['1', '2', '3', '4', '5', '6', '7', '8', '9', '10'])
+
+    def test_toDict(self):
+        matrix = CompatibilityMatrix([_version_file(KSP_VERSION_MIN='1.9', KSP_VERSION_MAX='1.10'),
+                                      _version_file(KSP_VERSION='any')],
+                                     builds_of(self.build_map))
+        self.assertEqual(matrix.compatible_builds(0), ['7', '8', '9'])
+        self.assertEqual(matrix.to_dict()['files'], {'1.9-1.10.version': '0000001110', 'any.version': '1111111111'})
+        self.assertEqual(matrix.to_dict()['builds'][1], {'id': '2', 'version': '1.8'})
+
+
+class TestCompatibilityIndex(TestCase):
+    file_versions = [None, 'any', '1.8', '1.8.0', '1.8.1', '1.8.2', '1.8.1.2694', '1.9', '1.9.1.2788', '1.10']
+    # Every version with parts from 0 to 2, below and above all of the above, as well as longer and shorter ones.
+    query_versions = [KspVersion(f'1.{minor}') for minor in range(7, 12)] + [
+        KspVersion(f'1.{minor}.{patch}{build}')
+        for minor in range(7, 12) for patch in range(0, 3) for build in ('', '.2694', '.2788')
+    ] + [KspVersion('0.7.3'), KspVersion('2.0')]
+
+    @classmethod
+    def setUpClass(cls):
+        cls.version_files = _version_files(cls.file_versions)
+        cls.index = CompatibilityIndex(cls.version_files)
+        # By position, versions like 1.8 and 1.8.1 are equal as keys.
+        cls.compatible = [{i for (i, vf) in enumerate(cls.version_files) if vf.is_compatible_with_ksp(version)}
+                          for version in cls.query_versions]
+
+    def test_compatibleWith(self):
+        for version in self.query_versions + [KspVersion('any')]:
+            expected = [vf for vf in self.version_files if vf.is_compatible_with_ksp(version)]
+            self.assertEqual(self.index.compatible_with(version), expected, str(version))
+
+    def expected_in_range(self, positions) -> list:
+        return [self.version_files[i] for i in sorted(set().union(*(self.compatible[p] for p in positions)))]
+
+    def test_compatibleWithRange(self):
+        for (vmin, vmax) in itertools.product(self.query_versions, repeat=2):
+            # Shorter versions are only in the range if all the versions they're equal to are.
+            between = [p for (p, v) in enumerate(self.query_versions)
+                       if vmin.sort_key <= v.sort_key and (v <= vmax if len(v.sort_key) >= len(vmax.sort_key)
+                                                           else v.sort_key < vmax.sort_key[:len(v.sort_key)])]
+            self.assertEqual(self.index.compatible_with_range(vmin, vmax), self.expected_in_range(between),
+                             f'{vmin} - {vmax}')
+
+    def test_compatibleWithOpenRange(self):
+        any_version = KspVersion('any')
+        self.assertEqual(self.index.compatible_with_range(any_version, any_version),
+                         self.expected_in_range(range(len(self.query_versions))))
+        self.assertEqual(self.index.compatible_with_range(KspVersion('1.10'), any_version),
+                         self.index.compatible_with_range(KspVersion('1.10'), KspVersion('99.0')))
+
+    def test_gaps(self):
+        index = CompatibilityIndex([_version_file(KSP_VERSION_MIN='1.8', KSP_VERSION_MAX='1.8.2'),
+                                    _version_file(KSP_VERSION='1.10'),
+                                    _version_file(KSP_VERSION_MIN='1.12.5')])
+        builds = builds_of(TestCompatibilityMatrix.build_map)
+        self.assertEqual([str(v) for v in index.gaps(builds.values())],
+                         ['0.7.3', '1.8.5.3000', '1.9.2781', '1.9.1.2788'])
+        self.assertEqual(CompatibilityIndex([_version_file(KSP_VERSION='any')]).gaps(builds.values()), [])
+        self.assertEqual(CompatibilityIndex([]).gaps(builds.values()), list(builds.values()))
@@ -1,8 +1,13 @@
+import json
 import os
+import subprocess
+import sys
+import tempfile
 from pathlib import Path
 from unittest import TestCase
 
 import validator.validator as validator
+from validator import timing
 from .test_utils import schema, build_map
 
 
@@ -38,10 +43,8 @@ class TestDefault(TestCase):
         (status, successful, failed, ignored) = validator.validate_cwd('["./**/*"]', schema, build_map)
         self.assertEqual(status, 0)
         self.assertSetEqual(successful, set())
-        self.assertSetEqual(ignored, {Path('default.version'),
-                                      Path('failing/failing-validation.version'),
-                                      Path('recursiveness/recursive.version'),
-                                      Path('recursiveness/recursiveness2/recursive2.version')})
+        # The directories are ignored as a whole, without searching them.
+        self.assertSetEqual(ignored, {Path('default.version'), Path('failing'), Path('recursiveness')})
         self.assertEqual(failed, set())
 
     def test_recursiveExclusion(self):
@@ -49,8 +52,7 @@ class TestDefault(TestCase):
                                                                        schema, build_map)
         self.assertEqual(status, 1)
         self.assertSetEqual(successful, {Path('default.version')})
-        self.assertSetEqual(ignored, {Path('recursiveness/recursive.version'),
-                                      Path('recursiveness/recursiveness2/recursive2.version')})
+        self.assertSetEqual(ignored, {Path('recursiveness')})
         self.assertEqual(failed, {Path('failing/failing-validation.version')})
 
     def test_multipleExclusions(self):
@@ -61,3 +63,57 @@ class TestDefault(TestCase):
                                          Path('recursiveness/recursiveness2/recursive2.version')})
         self.assertSetEqual(ignored, {Path('default.version'), Path('failing/failing-validation.version')})
         self.assertEqual(failed, set())
+
+    def test_processes(self):
+        with self.assertLogs(level='INFO') as single_process:
+            single_result = validator.validate_cwd('', schema, build_map)
+        with self.assertLogs(level='INFO') as multi_process:
+            multi_result = validator.validate_cwd('', schema, build_map, processes=2)
+        self.assertEqual(multi_result, single_result)
+        self.assertEqual(multi_process.output, single_process.output)
+
+        # Only this process logs, in order. Nothing the workers log may reach stderr on its own.
+        with tempfile.TemporaryDirectory() as tmp:
+            Path(tmp, 'schema.json').write_text(json.dumps(schema))
+            Path(tmp, 'builds.json').write_text(json.dumps(build_map))
+            code = ('import json, sys\n'
+                    'from validator.logger import setup_logger\n'
+                    'from validator.validator import validate_cwd\n'
+                    'setup_logger(True)\n'
+                    'schema = json.load(open(sys.argv[1]))\n'
+                    'build_map = json.load(open(sys.argv[2]))\n'
+                    'validate_cwd("", schema, build_map, processes=2)\n')
+            result = subprocess.run([sys.executable, '-c', code, str(Path(tmp, 'schema.json')),
+                                     str(Path(tmp, 'builds.json'))], env=dict(os.environ, PYTHONPATH=self.old_cwd),
+                                    capture_output=True, text=True, check=True)
+        self.assertIn('Checking default.version', result.stdout)
+        self.assertEqual(result.stderr, '')
+
+    def test_processesTimings(self):
+        timing.setup_timing()
+        try:
+            (_, successful, failed, _) = validator.validate_cwd('', schema, build_map, processes=2)
+            timings = timing.get_timings()
+        finally:
+            timing.setup_timing(False)
+        # Recorded in the workers.
+        self.assertIn('local_validation', timings.phases)
+        self.assertSetEqual(set(timings.files), {str(f) for f in successful | failed})
+
+    def test_validationErrorPosition(self):
+        with self.assertLogs(level='ERROR') as logs:
+            validator.validate_list(['failing/failing-validation.version'], schema, build_map)
+        record = next(record for record in logs.records if getattr(record, 'file', None))
+        # The value of KSP_VERSION.
+        self.assertEqual((record.line, record.col), (14, 18))
+
+    def test_allErrors(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            f = Path(tmp) / 'many-errors.version'
+            f.write_text('{\n  "NAME": 5,\n  "VERSION": "1.0",\n  "KSP_VERSION": "*",\n  "KSP_VERSION_MIN": "x"\n}')
+            with self.assertLogs(level='ERROR') as logs:
+                (status, _, failed, _) = validator.validate_list([str(f)], schema, build_map, all_errors=True)
+        self.assertEqual(status, 1)
+        self.assertEqual(len(failed), 1)
+        records = [record for record in logs.records if getattr(record, 'file', None)]
+        self.assertEqual([(record.line, record.col) for record in records], [(2, 11), (4, 18), (5, 22)])
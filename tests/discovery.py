@@ -0,0 +1,108 @@
+import json
+import os
+import subprocess
+import tempfile
+from pathlib import Path
+from unittest import TestCase, mock
+
+import validator.validator as validator
+from validator.exclusions import ExclusionMatcher
+
+
+class TestDiscovery(TestCase):
+    old_cwd = os.getcwd()
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp_dir.name)
+        for f in ['A.version', 'b.VERSION', '.version', 'c.version.json', 'GameData/Mod/Mod.version',
+                  'GameData/Mod/Textures/texture.dds', '.git/objects/x.version', '.svn/y.version']:
+            Path(f).parent.mkdir(parents=True, exist_ok=True)
+            Path(f).touch()
+        Path('GameData/Fake.version').mkdir()
+
+    def tearDown(self):
+        os.chdir(self.old_cwd)
+        self.tmp_dir.cleanup()
+
+    def test_findVersionFiles(self):
+        self.assertSetEqual(set(validator.find_version_files()),
+                            {Path('A.version'), Path('b.VERSION'), Path('GameData/Mod/Mod.version')})
+
+    def test_findVersionFiles_versionDir(self):
+        Path('GameData/Fake.version/Inner.version').touch()
+        self.assertIn(Path('GameData/Fake.version/Inner.version'), set(validator.find_version_files()))
+
+    def test_findVersionFiles_skipDir(self):
+        self.assertSetEqual(set(validator.find_version_files(skip_dir=lambda p: p == Path('GameData'))),
+                            {Path('A.version'), Path('b.VERSION')})
+
+    def git(self, *args):
+        try:
+            subprocess.run(['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com', *args],
+                           check=True, capture_output=True)
+        except (OSError, subprocess.CalledProcessError):
+            self.skipTest('git is not available')
+
+    def test_gitLsVersionFiles(self):
+        self.git('init', '-q')
+        Path('.gitignore').write_text('b.VERSION\n')
+        self.assertSetEqual(validator.git_ls_version_files(),
+                            {Path('A.version'), Path('GameData/Mod/Mod.version')})
+
+    def test_gitLsVersionFiles_noRepository(self):
+        os.environ['GIT_CEILING_DIRECTORIES'] = str(Path(self.tmp_dir.name).parent)
+        try:
+            self.assertIsNone(validator.git_ls_version_files())
+        finally:
+            del os.environ['GIT_CEILING_DIRECTORIES']
+
+    def commit_changes(self):
+        self.git('init', '-q')
+        Path('Remote.version').write_text('{}')
+        Path('GameData/Mod/Mod.version').write_text(json.dumps({
+            'URL': 'https://github.com/Someone/Mod/blob/master/Remote.version'
+        }))
+        self.git('add', '-A')
+        self.git('commit', '-q', '-m', 'Base')
+        self.git('branch', 'base')
+
+        Path('b.VERSION').write_text('{"NAME": "changed"}')
+        Path('New.version').touch()
+        Path('Remote.version').write_text('{"NAME": "changed"}')
+        self.git('add', '-A')
+        self.git('commit', '-q', '-m', 'Change')
+        Path('A.version').write_text('{"NAME": "changed"}')
+
+    def test_gitChangedVersionFiles(self):
+        self.commit_changes()
+        # Without GITHUB_REPOSITORY, the URL of any repository may point into this one.
+        env = {k: v for (k, v) in os.environ.items() if k != 'GITHUB_REPOSITORY'}
+        with mock.patch.dict(os.environ, env, clear=True):
+            self.assertSetEqual(validator.git_changed_version_files('base'),
+                                {Path('A.version'), Path('b.VERSION'), Path('New.version'), Path('Remote.version'),
+                                 Path('GameData/Mod/Mod.version')})
+
+    def test_gitChangedVersionFiles_githubRepository(self):
+        self.commit_changes()
+        changed = {Path('A.version'), Path('b.VERSION'), Path('New.version'), Path('Remote.version')}
+        with mock.patch.dict(os.environ, {'GITHUB_REPOSITORY': 'someone/mod'}):
+            self.assertSetEqual(validator.git_changed_version_files('base'),
+                                changed | {Path('GameData/Mod/Mod.version')})
+        # The URL points to another repository, its file didn't change.
+        with mock.patch.dict(os.environ, {'GITHUB_REPOSITORY': 'DasSkelett/AVC-VersionFileValidator'}):
+            self.assertSetEqual(validator.git_changed_version_files('base'), changed)
+
+    def test_gitChangedVersionFiles_excluded(self):
+        self.commit_changes()
+        matcher = ExclusionMatcher.from_json('["GameData/**/*"]')
+        with mock.patch.dict(os.environ, {'GITHUB_REPOSITORY': 'someone/mod'}), \
+                mock.patch.object(validator, '_remote_target', wraps=validator._remote_target) as remote_target:
+            self.assertSetEqual(validator.git_changed_version_files('base', matcher),
+                                {Path('A.version'), Path('b.VERSION'), Path('New.version'), Path('Remote.version')})
+        # Neither the changed nor the excluded version files are read.
+        remote_target.assert_not_called()
+
+    def test_gitChangedVersionFiles_unknownRef(self):
+        self.git('init', '-q')
+        self.assertIsNone(validator.git_changed_version_files('does-not-exist'))
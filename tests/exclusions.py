@@ -0,0 +1,51 @@
+import os
+from pathlib import Path
+from unittest import TestCase
+
+import validator.validator as validator
+from validator.exclusions import ExclusionMatcher
+
+
+class TestExclusionMatcher(TestCase):
+    old_cwd = os.getcwd()
+
+    @classmethod
+    def setUpClass(cls):
+        os.chdir('./tests/workspaces/default')
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls.old_cwd)
+
+    def assertSameAsGlob(self, pattern):
+        found_files = set(validator.find_version_files())
+        matcher = ExclusionMatcher([pattern])
+        self.assertSetEqual({f for f in found_files if matcher.matches(f)},
+                            found_files.intersection(Path().glob(pattern)), pattern)
+
+    def test_sameAsGlob(self):
+        for pattern in ['default.version', './failing/*', 'failing/*.version', '*', '*.version', '**/*',
+                        './**/*.version', 'recursiveness/**/*', '**/recursive?.version', '[de]efault.version',
+                        '[!d]efault.version', 'recursiveness/**', '**', 'recursiveness', './*/*/*.version']:
+            self.assertSameAsGlob(pattern)
+
+    def test_excludesSubtree(self):
+        matcher = ExclusionMatcher(['recursiveness/**/*', 'failing/*'])
+        self.assertTrue(matcher.excludes_subtree(Path('recursiveness')))
+        self.assertTrue(matcher.excludes_subtree(Path('recursiveness/recursiveness2')))
+        self.assertFalse(matcher.excludes_subtree(Path('failing')))
+        self.assertFalse(matcher.excludes_subtree(Path('recursivenessX')))
+
+    def test_excludesSubtree_all(self):
+        matcher = ExclusionMatcher.from_json('["./**/*"]')
+        self.assertTrue(matcher.excludes_subtree(Path('failing')))
+        self.assertTrue(matcher.excludes_subtree(Path('recursiveness/recursiveness2')))
+
+    def test_invalidPatterns(self):
+        matcher = ExclusionMatcher(['', '/default.version', 42])
+        self.assertFalse(matcher.matches(Path('default.version')))
+
+    def test_empty(self):
+        matcher = ExclusionMatcher.from_json(' ')
+        self.assertFalse(matcher.matches(Path('default.version')))
+        self.assertFalse(matcher.excludes_subtree(Path('failing')))
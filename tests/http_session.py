@@ -0,0 +1,65 @@
+import time
+from unittest import TestCase
+
+import requests
+
+from validator import http as validator_http
+from .test_utils import QuietHandler, ServedDirectory
+
+
+class _FlakyHandler(QuietHandler):
+    requests_seen = 0
+
+    def do_GET(self):
+        _FlakyHandler.requests_seen += 1
+        if self.path == '/slow':
+            time.sleep(1)
+        if self.path == '/flaky' and _FlakyHandler.requests_seen == 1:
+            self.send_response(503)
+            self.send_header('Retry-After', '0')
+            self.end_headers()
+            return
+        body = b'{}'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class TestHttp(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.served = ServedDirectory(_FlakyHandler)
+        cls.base_url = cls.served.base_url
+        cls.old_settings = validator_http.get_settings()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.served.close()
+        validator_http.setup_http(**cls.old_settings)
+
+    def setUp(self):
+        _FlakyHandler.requests_seen = 0
+
+    def test_retriesServerErrors(self):
+        validator_http.setup_http(retries=2)
+        response = validator_http.get(f'{self.base_url}/flaky')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(_FlakyHandler.requests_seen, 2)
+
+    def test_noRetries(self):
+        validator_http.setup_http(retries=0)
+        response = validator_http.get(f'{self.base_url}/flaky')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(_FlakyHandler.requests_seen, 1)
+
+    def test_timeout(self):
+        validator_http.setup_http(timeout=0.2, retries=0)
+        # requests reports it as ConnectionError when a Retry object is involved.
+        with self.assertRaises(requests.exceptions.RequestException):
+            validator_http.get(f'{self.base_url}/slow')
+
+    def test_sharedSession(self):
+        validator_http.setup_http()
+        self.assertIs(validator_http.get_session(), validator_http.get_session())
@@ -0,0 +1,90 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import validator.validator as validator
+from validator import results
+from .test_utils import schema, build_map
+
+
+class TestIncremental(TestCase):
+    old_cwd = os.getcwd()
+
+    @classmethod
+    def setUpClass(cls):
+        os.chdir('./tests/workspaces/default')
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls.old_cwd)
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.manifest_path = Path(self.tmp_dir.name, 'incremental.json')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_replaysUnchanged(self):
+        first = validator.validate_cwd('', schema, build_map, manifest_path=self.manifest_path)
+        self.assertTrue(self.manifest_path.is_file())
+
+        with self.assertLogs(level='INFO') as logs:
+            second = validator.validate_cwd('', schema, build_map, manifest_path=self.manifest_path)
+        self.assertEqual(first, second)
+        self.assertIn('INFO:root:default.version is unchanged, reusing the previous result', logs.output)
+        self.assertNotIn('INFO:root:Checking default.version', logs.output)
+        # The validation error of the failing file is logged again.
+        self.assertTrue(any(o.startswith('ERROR:root:Validation of failing/failing-validation.version failed')
+                            for o in logs.output))
+
+    def test_invalidatedByNewKspVersion(self):
+        validator.validate_cwd('', schema, build_map, manifest_path=self.manifest_path)
+
+        new_build_map = {'builds': {**build_map['builds'], '99999': '99.0.0.99999'}}
+        with self.assertLogs(level='INFO') as logs:
+            validator.validate_cwd('', schema, new_build_map, manifest_path=self.manifest_path)
+        self.assertIn('INFO:root:Checking default.version', logs.output)
+
+    def test_invalidatedByAllErrors(self):
+        validator.validate_cwd('', schema, build_map, manifest_path=self.manifest_path)
+
+        with self.assertLogs(level='INFO') as logs:
+            validator.validate_cwd('', schema, build_map, manifest_path=self.manifest_path, all_errors=True)
+        self.assertIn('INFO:root:Checking default.version', logs.output)
+
+    def test_prunesUnseenFiles(self):
+        validator.validate_cwd('', schema, build_map, manifest_path=self.manifest_path)
+        validator.validate_cwd('["./recursiveness/**/*"]', schema, build_map, manifest_path=self.manifest_path)
+        files = json.loads(self.manifest_path.read_text())['files']
+        self.assertSetEqual(set(files), {'default.version', str(Path('failing/failing-validation.version'))})
+
+    def test_malformedManifest(self):
+        self.manifest_path.write_text('[]')
+        first = validator.validate_cwd('', schema, build_map, manifest_path=self.manifest_path)
+        self.assertEqual(first, validator.validate_cwd('', schema, build_map))
+
+    def test_unwritableManifest(self):
+        self.manifest_path.mkdir()
+        with self.assertLogs(level='WARNING') as logs:
+            result = validator.validate_cwd('', schema, build_map, manifest_path=self.manifest_path)
+        self.assertEqual(result, validator.validate_cwd('', schema, build_map))
+        self.assertTrue(any(o.startswith('WARNING:root:Failed saving the manifest') for o in logs.output))
+
+    def test_replaysRemoteStatus(self):
+        # Checked again, the first run didn't collect the status of the remotes.
+        validator.validate_cwd('', schema, build_map, manifest_path=self.manifest_path)
+        for _ in range(2):
+            results.setup_results()
+            try:
+                run = validator.validate_cwd('', schema, build_map, manifest_path=self.manifest_path)
+                file_results = results.get_results().file_results(*run[1:])
+            finally:
+                results.setup_results(False)
+            self.assertEqual({r['file']: r['remote'] for r in file_results},
+                             {'default.version': results.REMOTE_NONE,
+                              str(Path('failing/failing-validation.version')): None,
+                              str(Path('recursiveness/recursive.version')): results.REMOTE_NONE,
+                              str(Path('recursiveness/recursiveness2/recursive2.version')): results.REMOTE_NONE})
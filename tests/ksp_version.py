@@ -1,6 +1,8 @@
+import pickle
 from unittest import TestCase
 
 from validator.ksp_version import KspVersion
+from validator.validator import LatestKspVersion, parse_latest_ksp_version
 
 
 class TestKspVersion(TestCase):
@@ -87,3 +89,67 @@ class TestKspVersion(TestCase):
         self.assertTrue(KspVersion('1.9.1.2788').fully_equals(KspVersion('1.9.1.2788')))
         self.assertFalse(KspVersion('1.9.1.2788').fully_equals(KspVersion('1.9.1')))
         self.assertFalse(KspVersion('1.9.1.2788').fully_equals(KspVersion('1.9.1.9999')))
+
+    def test_hash(self):
+        # Equal versions have the same hash, even if one has more parts.
+        self.assertEqual(hash(KspVersion('1.9.1')), hash(KspVersion('1.9')))
+        self.assertEqual(len({KspVersion('1.9.1'), KspVersion('1.9.1'), KspVersion('1.10')}), 2)
+        self.assertEqual({KspVersion('1.9.1'): 'x'}[KspVersion('1.9.1')], 'x')
+
+    def test_interned(self):
+        self.assertIs(KspVersion('1.12.5'), KspVersion('1.12.5'))
+        self.assertIs(KspVersion({'MAJOR': 1, 'MINOR': 12}), KspVersion({'MAJOR': 1, 'MINOR': 12}))
+
+    def test_immutable(self):
+        v = KspVersion('1.12.5')
+        with self.assertRaises(AttributeError):
+            v.major = 2
+        with self.assertRaises(AttributeError):
+            v.something = 2
+
+    def test_sort_key(self):
+        versions = [KspVersion(v) for v in ('1.10', '1.9.1', '1.9', '1.2.3.4', '0.7.3')]
+        self.assertEqual([str(v) for v in sorted(versions, key=lambda v: v.sort_key)],
+                         ['0.7.3', '1.2.3.4', '1.9', '1.9.1', '1.10'])
+
+    def test_comp_zero_patch(self):
+        # A zero PATCH counts as missing, so the BUILD isn't compared either.
+        self.assertEqual(KspVersion('1.9.0.5'), KspVersion('1.9.0.7'))
+        self.assertFalse(KspVersion('1.9.0.5').fully_equals(KspVersion('1.9.0.7')))
+
+    def test_pickle(self):
+        v = KspVersion('1.9.0.2788')
+        self.assertTrue(pickle.loads(pickle.dumps(v)).fully_equals(v))
+
+    def test_any(self):
+        self.assertEqual(KspVersion('any'), KspVersion('any'))
+        self.assertNotEqual(KspVersion('any'), KspVersion('1.9'))
+        self.assertEqual(str(KspVersion('any')), 'any')
+
+
+class TestLatestKspVersion(TestCase):
+
+    def test_parse_pretty(self):
+        text = '{\n    "builds": {\n        "1": "0.7.3",\n        "3190": "1.12.5.3190"\n    }\n}\n'
+        self.assertTrue(parse_latest_ksp_version(text).fully_equals(KspVersion('1.12.5.3190')))
+
+    def test_parse_compact(self):
+        text = '{"builds":{"1":"0.7.3","3190":"1.12.5.3190"}}'
+        self.assertTrue(parse_latest_ksp_version(text).fully_equals(KspVersion('1.12.5.3190')))
+
+    def test_parse_unexpectedFormat(self):
+        self.assertIsNone(parse_latest_ksp_version('{"builds": {"1": "0.7.3", "2": 5}}'))
+        self.assertIsNone(parse_latest_ksp_version('{"builds": {}}'))
+        self.assertIsNone(parse_latest_ksp_version('not json'))
+
+    def test_pinned(self):
+        pinned = KspVersion('1.8.1')
+        provider = LatestKspVersion(pinned, {'builds': {'1': '1.12.5'}})
+        self.assertIs(provider.get(), pinned)
+
+    def test_buildMap(self):
+        provider = LatestKspVersion(build_map={'builds': {'1': '1.8.1', '2': '1.12.5'}})
+        self.assertTrue(provider.get().fully_equals(KspVersion('1.12.5')))
+
+    def test_fixedNone(self):
+        self.assertIsNone(LatestKspVersion.fixed(None).get())
@@ -0,0 +1,72 @@
+import io
+import logging
+from pathlib import Path
+from unittest import TestCase
+
+from validator.logger import BufferedStreamHandler, LogExtra, LogFormatter
+
+
+def _record(level, msg, args=(), **extra) -> logging.LogRecord:
+    record = logging.LogRecord('test', level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class _CountingStream(io.StringIO):
+    flushes = 0
+
+    def flush(self):
+        self.flushes += 1
+        super().flush()
+
+
+class TestLogFormatter(TestCase):
+
+    def test_levels(self):
+        formatter = LogFormatter()
+        self.assertEqual(formatter.format(_record(logging.DEBUG, 'Loading %s', (Path('a.version'),))),
+                         '::DEBUG::Loading a.version')
+        self.assertEqual(formatter.format(_record(logging.INFO, 'Checking')), '::INFO::Checking')
+        self.assertEqual(formatter.format(_record(logging.WARNING, 'Outdated')), '::WARNING::Outdated')
+        self.assertEqual(formatter.format(_record(logging.CRITICAL, 'Broken')), '50: Broken')
+
+    def test_file(self):
+        formatter = LogFormatter()
+        extra = LogExtra(Path('a.version'), 3, 7).asdict()
+        self.assertEqual(formatter.format(_record(logging.ERROR, 'Invalid', **extra)),
+                         '::ERROR file=a.version,line=3,col=7::Invalid')
+        self.assertEqual(formatter.format(_record(logging.WARNING, 'Outdated', file=Path('a.version'), line=None)),
+                         '::WARNING file=a.version,line=1,col=1::Outdated')
+
+    def test_percentSignsAppliedOnce(self):
+        formatter = LogFormatter()
+        self.assertEqual(formatter.format(_record(logging.WARNING, 'Failed at %s', ('https://a/b%20c',))),
+                         '::WARNING::Failed at https://a/b%20c')
+        self.assertEqual(formatter.format(_record(logging.INFO, '100% done')), '::INFO::100% done')
+
+    def test_maxAnnotations(self):
+        formatter = LogFormatter(max_annotations=2)
+        extra = LogExtra(Path('a.version')).asdict()
+        warnings = [formatter.format(_record(logging.WARNING, f'Warning {i}', **extra)) for i in range(4)]
+        self.assertEqual(warnings[:2], ['::WARNING file=a.version,line=1,col=1::Warning 0',
+                                        '::WARNING file=a.version,line=1,col=1::Warning 1'])
+        self.assertEqual(warnings[2], 'Only the first 2 warnings are annotations, the following ones are not\n'
+                                      'Warning in a.version, line 1, col 1: Warning 2')
+        self.assertEqual(warnings[3], 'Warning in a.version, line 1, col 1: Warning 3')
+        # Counted separately.
+        self.assertEqual(formatter.format(_record(logging.ERROR, 'Invalid')), '::ERROR::Invalid')
+        self.assertEqual(formatter.format(_record(logging.INFO, 'Checking')), '::INFO::Checking')
+
+
+class TestBufferedStreamHandler(TestCase):
+
+    def test_flushesOnlyWhenAsked(self):
+        stream = _CountingStream()
+        handler = BufferedStreamHandler(stream)
+        handler.setFormatter(LogFormatter())
+        for i in range(3):
+            handler.handle(_record(logging.INFO, 'Checking %d', (i,)))
+        self.assertEqual(stream.flushes, 0)
+        handler.flush()
+        self.assertEqual(stream.flushes, 1)
+        self.assertEqual(stream.getvalue(), '::INFO::Checking 0\n::INFO::Checking 1\n::INFO::Checking 2\n')
@@ -0,0 +1,79 @@
+import tempfile
+from pathlib import Path, PurePosixPath
+from unittest import TestCase
+
+import requests
+
+import validator.http as validator_http
+from validator.cache import DownloadCache
+from validator.mirror import MirrorAdapter, mirror_path, prefetch
+from .test_utils import ServedDirectory
+
+
+class TestMirror(TestCase):
+    url = 'https://github.com/Someone/Mod/raw/master/Mod.version'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.old_settings = validator_http.get_settings()
+        cls.served = ServedDirectory()
+        Path(cls.served.path, 'Mod.version').write_text('{"NAME": "Mod"}')
+        cls.server_url = cls.served.base_url
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.served.close()
+        validator_http.setup_http(**cls.old_settings)
+
+    def setUp(self):
+        self.mirror_dir = tempfile.TemporaryDirectory()
+        self.mirror = Path(self.mirror_dir.name)
+        file = self.mirror / mirror_path(self.url)
+        file.parent.mkdir(parents=True)
+        file.write_text('{"NAME": "Mirrored"}')
+
+    def tearDown(self):
+        self.mirror_dir.cleanup()
+
+    def test_mirrorPath(self):
+        self.assertEqual(mirror_path(self.url), PurePosixPath('github.com/Someone/Mod/raw/master/Mod.version'))
+        self.assertEqual(mirror_path('http://LocalHost:8000/a/../b/'), PurePosixPath('localhost_8000/a/b/index'))
+        self.assertNotEqual(mirror_path('https://example.com/f?a=1'), mirror_path('https://example.com/f?a=2'))
+
+    def test_directory(self):
+        validator_http.setup_http(retries=0, mirror=str(self.mirror))
+        self.assertEqual(validator_http.get(self.url).json(), {'NAME': 'Mirrored'})
+        missing = validator_http.get('https://github.com/Someone/Other/raw/master/Other.version')
+        self.assertEqual(missing.status_code, 404)
+        with self.assertRaises(requests.exceptions.HTTPError):
+            missing.raise_for_status()
+
+    def test_directory_conditional(self):
+        validator_http.setup_http(retries=0, mirror=str(self.mirror))
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = DownloadCache(Path(cache_dir))
+            self.assertEqual(cache.fetch(self.url), '{"NAME": "Mirrored"}')
+            etag = validator_http.get(self.url).headers['ETag']
+            self.assertEqual(validator_http.get(self.url, headers={'If-None-Match': etag}).status_code, 304)
+            self.assertEqual(cache.fetch(self.url), '{"NAME": "Mirrored"}')
+
+    def test_loopbackNotMirrored(self):
+        validator_http.setup_http(retries=0, mirror=str(self.mirror))
+        self.assertEqual(validator_http.get(f'{self.server_url}/Mod.version').json(), {'NAME': 'Mod'})
+
+    def test_server(self):
+        # The stand-in serves a mirror directory, like 'python -m http.server --directory <mirror>' would.
+        with ServedDirectory(directory=self.mirror) as stand_in:
+            validator_http.setup_http(retries=0, mirror=f'{stand_in.base_url}/')
+            self.assertEqual(validator_http.get(self.url).json(), {'NAME': 'Mirrored'})
+
+    def test_prefetch(self):
+        validator_http.setup_http(retries=0)
+        url = f'{self.server_url}/Mod.version'
+        failed = prefetch(self.mirror, [url, url, f'{self.server_url}/Missing.version'])
+        self.assertEqual(failed, [f'{self.server_url}/Missing.version'])
+        self.assertEqual((self.mirror / mirror_path(url)).read_text(), '{"NAME": "Mod"}')
+
+        adapter = MirrorAdapter(str(self.mirror), requests.adapters.HTTPAdapter())
+        request = requests.Request('GET', self.url).prepare()
+        self.assertEqual(adapter.send(request).text, '{"NAME": "Mirrored"}')
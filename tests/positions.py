@@ -0,0 +1,44 @@
+import json
+from unittest import TestCase
+
+from validator import positions
+
+CONTENT = '''{
+  "NAME": "Test",
+  "VERSION": {"MAJOR": 1, "MINOR": -2.5e3},
+  "LIST": [true, {"a/b~": null}, [], {}],
+\t"KSP_VERSION": "*", "NAME": "Duplicate"
+}'''
+
+
+class TestPositions(TestCase):
+
+    def test_sameAsJson(self):
+        for content in (CONTENT, '[]', ' "string" ', '-Infinity', '{"a": NaN, "b": [1e5, 0, -0.5]}', '{}'):
+            self.assertEqual(repr(positions.loads(content)[0]), repr(json.loads(content)), content)
+
+    def test_positions(self):
+        (_, found) = positions.loads(CONTENT)
+        self.assertEqual(found[''], (1, 1))
+        self.assertEqual(found['/VERSION/MINOR'], (3, 36))
+        self.assertEqual(found['/LIST/1/a~1b~0'], (4, 27))
+        self.assertEqual(found['/LIST/3'], (4, 38))
+        self.assertEqual(found['/KSP_VERSION'], (5, 17))
+        # The last one wins, like in the parsed JSON.
+        self.assertEqual(found['/NAME'], (5, 30))
+
+    def test_find(self):
+        (_, found) = positions.loads(CONTENT)
+        self.assertEqual(positions.find(found, ['VERSION', 'MINOR']), (3, 36))
+        self.assertEqual(positions.find(found, ['LIST', 1, 'a/b~']), (4, 27))
+        self.assertEqual(positions.find(found, ['VERSION', 'PATCH']), (3, 14))
+        self.assertEqual(positions.find(found, []), (1, 1))
+
+    def test_sameErrorAsJson(self):
+        invalid = ('{"NAME": "Test",}', '{"NAME" "Test"}', '[1, 2', '{"a": 1} x', '', '{"a": tru}', '{"a": "\\x"}')
+        for content in invalid:
+            with self.assertRaises(json.JSONDecodeError) as expected:
+                json.loads(content)
+            with self.assertRaises(json.JSONDecodeError) as got:
+                positions.loads(content)
+            self.assertEqual(str(got.exception), str(expected.exception), content)
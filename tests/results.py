@@ -0,0 +1,98 @@
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import validator.validator as validator
+from validator import results
+from .test_utils import schema, build_map
+
+
+class TestResults(TestCase):
+
+    def setUp(self):
+        results.setup_results()
+
+    def tearDown(self):
+        results.setup_results(False)
+
+    def test_messagesPerFile(self):
+        log = logging.getLogger()
+        log.warning('A warning', extra={'file': Path('./a.version'), 'line': 3, 'col': 7})
+        log.error('An error', extra={'file': Path('a.version'), 'line': 1, 'col': 1})
+        log.error('Something else went wrong')
+        log.info('Not recorded', extra={'file': Path('a.version'), 'line': 1, 'col': 1})
+        results.set_remote_status(Path('./a.version'), results.REMOTE_DOWNLOAD_FAILED)
+
+        file_results = results.get_results().file_results([], [Path('a.version')], ['b.version'])
+        self.assertEqual(file_results, [
+            {'file': 'a.version', 'status': 'failed', 'remote': results.REMOTE_DOWNLOAD_FAILED, 'messages': [
+                {'level': 'warning', 'message': 'A warning', 'line': 3, 'col': 7},
+                {'level': 'error', 'message': 'An error', 'line': 1, 'col': 1}
+            ]},
+            {'file': 'b.version', 'status': 'ignored', 'remote': None, 'messages': []}
+        ])
+        self.assertEqual(results.get_results().run_messages,
+                         [{'level': 'error', 'message': 'Something else went wrong'}])
+
+    def test_disabled(self):
+        results.setup_results(False)
+        results.set_remote_status(Path('a.version'), results.REMOTE_VALID)
+        self.assertIsNone(results.get_results())
+        self.assertFalse([h for h in logging.getLogger().handlers if isinstance(h, results.Results)])
+
+    def test_unknownFormat(self):
+        with self.assertRaises(ValueError):
+            results.write_results(Path('results.txt'), 'txt', 0, [], [], [])
+
+
+class TestResultsWorkspace(TestCase):
+    old_cwd = os.getcwd()
+
+    @classmethod
+    def setUpClass(cls):
+        os.chdir('./tests/workspaces/default')
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls.old_cwd)
+
+    def setUp(self):
+        results.setup_results()
+
+    def tearDown(self):
+        results.setup_results(False)
+
+    def test_jsonl(self):
+        (status, successful, failed, ignored) = validator.validate_cwd('', schema, build_map)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp, 'results.jsonl')
+            results.write_results(path, 'jsonl', status, successful, failed, ignored)
+            lines = [json.loads(line) for line in path.read_text().splitlines()]
+
+        files = {line['file']: line for line in lines if line['type'] == 'file'}
+        self.assertEqual(files['failing/failing-validation.version']['status'], 'failed')
+        self.assertEqual(files['failing/failing-validation.version']['messages'][0]['level'], 'error')
+        self.assertIsNone(files['failing/failing-validation.version']['remote'])
+        self.assertEqual(files['default.version']['status'], 'successful')
+        self.assertEqual(lines[-1]['type'], 'run')
+        self.assertEqual(lines[-1]['status'], 1)
+        self.assertEqual(lines[-1]['failed'], 1)
+
+    def test_sarif(self):
+        (status, successful, failed, ignored) = validator.validate_cwd('', schema, build_map)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp, 'results.sarif')
+            results.write_results(path, 'sarif', status, successful, failed, ignored)
+            sarif = json.loads(path.read_text())
+
+        self.assertEqual(sarif['version'], '2.1.0')
+        run = sarif['runs'][0]
+        self.assertTrue(run['invocations'][0]['executionSuccessful'])
+        errors = [r for r in run['results'] if r['level'] == 'error']
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0]['ruleId'], 'invalid-version-file')
+        self.assertEqual(errors[0]['locations'][0]['physicalLocation']['artifactLocation']['uri'],
+                         'failing/failing-validation.version')
@@ -45,3 +45,9 @@ class TestSingleFiles(TestCase):
         wanted = set()
         wanted.add(Path('valid-remote.version'))
         self.assertEquals(wanted, successful)
+
+    def test_validRemote_singleWorker(self):
+        (status, successful, failed, ignored) = validator.validate_list(['./valid-remote.version'], schema, build_map,
+                                                                        max_workers=1)
+        self.assertEqual(status, 0)
+        self.assertSetEqual(successful, {Path('valid-remote.version')})
@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+import tempfile
+from unittest import TestCase
+
+# Slow to import, only needed once there's something to download or validate.
+HEAVY_MODULES = ('requests', 'jsonschema', 'urllib3', 'multiprocessing')
+
+
+class TestStartup(TestCase):
+
+    def loaded_heavy_modules(self, code: str, cwd: str) -> list:
+        env = dict(os.environ, PYTHONPATH=os.getcwd())
+        code += f'\nprint(" ".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))'
+        result = subprocess.run([sys.executable, '-c', code], cwd=cwd, env=env,
+                                stdout=subprocess.PIPE, check=True, text=True)
+        return result.stdout.splitlines()[-1].split()
+
+    def test_importMain(self):
+        self.assertEqual(self.loaded_heavy_modules('import sys\nimport main', os.getcwd()), [])
+
+    def test_noVersionFiles(self):
+        code = 'import sys\nimport main\nfrom validator.validator import validate_cwd\nvalidate_cwd("")'
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertEqual(self.loaded_heavy_modules(code, tmp), [])
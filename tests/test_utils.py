@@ -1,5 +1,59 @@
+import functools
+import http.server
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from validator.http import setup_http
 from validator.validator import get_schema, get_build_map
 
+# To run the tests without internet, fill a mirror with 'python -m validator.mirror prefetch <mirror> tests/workspaces'
+# and point INPUT_MIRROR to it.
+if mirror := os.getenv('INPUT_MIRROR'):
+    setup_http(mirror=mirror)
+
 
 schema = get_schema()
 build_map = get_build_map()
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    """Serves the files of a directory without logging every request."""
+
+    def log_message(self, *args):
+        pass
+
+
+class ServedDirectory:
+    """Serves the files of a directory on localhost in a background thread, for the tests that download something.
+
+    Close it when done, or use it as context manager.
+    """
+
+    def __init__(self, handler_class=QuietHandler, directory: Path = None):
+        """
+        :param handler_class: Handles the requests, a QuietHandler or a subclass to count or change them.
+        :param directory: The directory to serve. By default a new temporary one, which is deleted on close().
+        """
+        self._tmp_dir = tempfile.TemporaryDirectory() if directory is None else None
+        self.path = Path(self._tmp_dir.name if directory is None else directory)
+        handler = functools.partial(handler_class, directory=str(self.path))
+        self._server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.base_url = f'http://127.0.0.1:{self._server.server_port}'
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def url(self, name: str) -> str:
+        return f'{self.base_url}/{name}'
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._tmp_dir is not None:
+            self._tmp_dir.cleanup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,65 @@
+import json
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from validator import timing
+
+
+class TestTiming(TestCase):
+
+    def tearDown(self):
+        timing.setup_timing(False)
+
+    def test_disabledByDefault(self):
+        timing.setup_timing(False)
+        with timing.phase('discovery'), timing.file(Path('a.version')):
+            timing.add_download('https://example.com/a.version', 10, 0.5, 200)
+        self.assertIsNone(timing.get_timings())
+
+    def test_phasesAddUp(self):
+        timing.setup_timing()
+        with timing.phase('remote'):
+            pass
+        with timing.phase('remote'):
+            pass
+        with self.assertRaises(ValueError):
+            with timing.phase('validation'):
+                raise ValueError()
+        self.assertEqual(set(timing.get_timings().phases), {'remote', 'validation'})
+
+    def test_slowest(self):
+        timings = timing.Timings()
+        timings.files = {'a.version': 0.1, 'b.version': 0.3, 'c.version': 0.2}
+        timings.add_download('https://example.com/fast', 100, 0.1, 200)
+        timings.add_download('https://example.com/slow', 2048, 1.5, 200)
+        timings.add_download('https://example.com/gone', 0, 0.4, 404)
+
+        report = timings.to_dict(2)
+        self.assertEqual(report['files'], 3)
+        self.assertEqual(report['downloads'], 3)
+        self.assertEqual(report['bytes_downloaded'], 2148)
+        self.assertEqual([f['file'] for f in report['slowest_files']], ['b.version', 'c.version'])
+        self.assertEqual([d['url'] for d in report['slowest_downloads']],
+                         ['https://example.com/slow', 'https://example.com/gone'])
+
+        markdown = timings.to_markdown(2)
+        self.assertIn('| `b.version` | 0.300 |', markdown)
+        self.assertIn('| https://example.com/slow | 200 | 2.0 | 1.500 |', markdown)
+
+    def test_writeReports(self):
+        timing.setup_timing()
+        with timing.file(Path('a.version')):
+            timing.add_download('https://example.com/a.version', 10, 0.5, 200)
+        with tempfile.TemporaryDirectory() as tmp:
+            report_path = Path(tmp, 'timings.json')
+            summary_path = Path(tmp, 'summary.md')
+            summary_path.write_text('Previous step\n')
+            timing.write_reports(report_path, summary_path)
+
+            report = json.loads(report_path.read_text())
+            self.assertEqual(report['files'], 1)
+            self.assertEqual(report['slowest_downloads'][0]['url'], 'https://example.com/a.version')
+            summary = summary_path.read_text()
+            self.assertTrue(summary.startswith('Previous step\n'))
+            self.assertIn('1 files checked, 1 downloads', summary)
@@ -1,6 +1,17 @@
+import json
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from unittest import TestCase
 
-from validator.versionfile import get_raw_uri
+import jsonschema
+import requests
+
+import validator.validator as validator
+from validator.ksp_version import KspVersion
+from validator.versionfile import RemoteCache, VersionFile, compile_schema, get_raw_uri, get_repository_location
+from .cache import _CountingValidator
+from .test_utils import QuietHandler, ServedDirectory, schema, build_map
 
 
 class TestVersionFile(TestCase):
@@ -35,3 +46,175 @@ class TestVersionFile(TestCase):
         got_after = get_raw_uri(before)
 
         self.assertEqual(before, got_after)
+
+    def test_compiledSchema_sameErrorAsValidate(self):
+        schema_validator = compile_schema(schema)
+        content = json.dumps({'NAME': 'Test', 'VERSION': '1.0', 'KSP_VERSION': '*'})
+
+        with self.assertRaises(jsonschema.ValidationError) as expected:
+            jsonschema.validate(json.loads(content), schema)
+        with self.assertRaises(jsonschema.ValidationError) as got:
+            VersionFile(content, Path('test.version')).validate(schema_validator)
+
+        self.assertEqual(expected.exception.message, got.exception.message)
+        self.assertEqual(list(expected.exception.path), list(got.exception.path))
+
+    def test_compiledSchema_reusable(self):
+        schema_validator = compile_schema(schema)
+        for i in range(3):
+            version_file = VersionFile(json.dumps({'NAME': f'Test{i}', 'VERSION': f'1.{i}', 'KSP_VERSION': 'any'}),
+                                       Path('test.version'))
+            version_file.validate(schema_validator)
+            self.assertTrue(version_file.valid)
+
+    def test_fields(self):
+        version_file = VersionFile(json.dumps({'NAME': 'Test', 'VERSION': '1.0', 'KSP_VERSION_MIN': '1.8',
+                                               'GITHUB': {'USERNAME': 'DasSkelett'}}), Path('test.version'))
+        self.assertEqual(version_file.name, 'Test')
+        self.assertTrue(version_file.github)
+        self.assertEqual(version_file.github_username, 'DasSkelett')
+        self.assertIsNone(version_file.github_repository)
+        self.assertIsNone(version_file.url)
+        self.assertEqual(version_file.ksp_version_min, KspVersion('1.8'))
+        self.assertIsNone(version_file.ksp_version)
+        self.assertFalse(hasattr(version_file, '__dict__'))
+
+    def test_compact(self):
+        content = json.dumps({'NAME': 'Test', 'VERSION': '1.0', 'URL': 'https://example.com/Test.version',
+                              'KSP_VERSION_MIN': '1.8', 'KSP_VERSION_MAX': '1.12'})
+        version_file = VersionFile(content, Path('test.version'), compact=True)
+        self.assertEqual(version_file.name, 'Test')
+
+        schema_validator = compile_schema(schema)
+        version_file.validate(schema_validator)
+        self.assertTrue(version_file.valid)
+        with self.assertRaises(AttributeError):
+            _ = version_file.name
+        self.assertEqual(version_file.url, 'https://example.com/Test.version')
+        self.assertTrue(version_file.is_compatible_with_ksp(KspVersion('1.10.1')))
+        # The result is still remembered, but can't be found out for another schema anymore.
+        version_file.validate(schema_validator)
+        with self.assertRaises(ValueError):
+            version_file.validate(compile_schema(schema))
+
+    def test_compact_invalid(self):
+        content = json.dumps({'NAME': 'Test', 'VERSION': '1.0', 'KSP_VERSION': '*'})
+        version_file = VersionFile(content, Path('test.version'), compact=True)
+        for _ in range(2):
+            with self.assertRaises(jsonschema.ValidationError):
+                version_file.validate(schema)
+        self.assertFalse(version_file.valid)
+
+    def test_validationErrors(self):
+        content = '{\n  "NAME": 5,\n  "VERSION": "1.0",\n  "KSP_VERSION": "*",\n  "KSP_VERSION_MIN": "x"\n}'
+        version_file = VersionFile(content, Path('test.version'), compact=True, positions=True)
+        with self.assertRaises(jsonschema.ValidationError) as raised:
+            version_file.validate(compile_schema(schema))
+
+        errors = version_file.validation_errors
+        self.assertEqual([list(e.absolute_path) for e in errors], [['NAME'], ['KSP_VERSION'], ['KSP_VERSION_MIN']])
+        self.assertEqual([version_file.position_of(e.absolute_path) for e in errors], [(2, 11), (4, 18), (5, 22)])
+        self.assertIn(raised.exception.message, [e.message for e in errors])
+
+    def test_validationErrors_valid(self):
+        version_file = VersionFile(json.dumps({'NAME': 'Test', 'VERSION': '1.0', 'KSP_VERSION': 'any'}),
+                                   Path('test.version'))
+        self.assertEqual(version_file.validation_errors, [])
+        version_file.validate(schema)
+        self.assertEqual(version_file.validation_errors, [])
+
+    def test_getRepositoryLocation(self):
+        self.assertEqual(get_repository_location('https://github.com/DasSkelett/AVC/blob/master/Mod/Mod.version'),
+                         ('DasSkelett/AVC', 'Mod/Mod.version'))
+        self.assertEqual(get_repository_location('https://raw.githubusercontent.com/DasSkelett/AVC/master/A.version'),
+                         ('DasSkelett/AVC', 'A.version'))
+        self.assertIsNone(get_repository_location('https://github.com/DasSkelett/AVC'))
+        self.assertIsNone(get_repository_location('https://example.com/DasSkelett/AVC/raw/master/A.version'))
+
+
+class _CountingHandler(QuietHandler):
+    requests_seen = 0
+
+    def do_GET(self):
+        _CountingHandler.requests_seen += 1
+        super().do_GET()
+
+
+class TestRemoteCache(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.served = ServedDirectory(_CountingHandler)
+        Path(cls.served.path, 'remote.version').write_text(json.dumps({'NAME': 'Remote', 'VERSION': '1.0'}))
+        cls.base_url = cls.served.base_url
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.served.close()
+
+    def setUp(self):
+        _CountingHandler.requests_seen = 0
+
+    def version_file(self, url):
+        return VersionFile(json.dumps({'NAME': 'Local', 'VERSION': '1.0', 'URL': url}), Path('local.version'))
+
+    def test_downloadsOnce(self):
+        remote_cache = RemoteCache()
+        url = f'{self.base_url}/remote.version'
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            remotes = list(executor.map(lambda _: self.version_file(url).get_remote(remote_cache), range(20)))
+
+        self.assertEqual(_CountingHandler.requests_seen, 1)
+        self.assertTrue(all(remote is remotes[0] for remote in remotes))
+        self.assertEqual(remotes[0].name, 'Remote')
+
+    def test_remembersFailures(self):
+        remote_cache = RemoteCache()
+        url = f'{self.base_url}/missing.version'
+        for _ in range(3):
+            with self.assertRaises(requests.exceptions.HTTPError):
+                self.version_file(url).get_remote(remote_cache)
+        self.assertEqual(_CountingHandler.requests_seen, 1)
+
+    def test_skipsInvalidFiles(self):
+        url = f'{self.base_url}/remote.version'
+        with tempfile.TemporaryDirectory() as tmp:
+            invalid = Path(tmp, 'invalid.version')
+            invalid.write_text(json.dumps({'NAME': 'Local', 'VERSION': '*', 'URL': url}))
+            valid = Path(tmp, 'valid.version')
+            valid.write_text(json.dumps({'NAME': 'Local', 'VERSION': '1.0', 'URL': url}))
+
+            (status, _, failed, _) = validator.validate_list([str(invalid)], schema, build_map)
+            self.assertEqual((status, failed), (1, {invalid}))
+            self.assertEqual(_CountingHandler.requests_seen, 0)
+            (status, _, _, _) = validator.validate_list([str(valid)], schema, build_map)
+            self.assertEqual(status, 0)
+            self.assertEqual(_CountingHandler.requests_seen, 1)
+
+    def test_validatesOnce(self):
+        remote_cache = RemoteCache()
+        url = f'{self.base_url}/remote.version'
+        schema_validator = _CountingValidator(schema)
+        for _ in range(3):
+            remote = self.version_file(url).get_remote(remote_cache)
+            remote.validate(schema_validator)
+            self.assertTrue(remote.valid)
+        # The remote is shared, so it's downloaded and validated only once.
+        self.assertEqual(_CountingHandler.requests_seen, 1)
+        self.assertEqual(schema_validator.validated, 1)
+
+    def test_compact(self):
+        remote_cache = RemoteCache(compact=True)
+        url = f'{self.base_url}/remote.version'
+        schema_validator = compile_schema(schema)
+
+        def check(_):
+            remote = self.version_file(url).get_remote(remote_cache)
+            remote.validate(schema_validator)
+            return remote
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            remotes = list(executor.map(check, range(20)))
+
+        self.assertTrue(all(remote is remotes[0] and remote.valid for remote in remotes))
+        with self.assertRaises(AttributeError):
+            _ = remotes[0].json
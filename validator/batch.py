@@ -0,0 +1,62 @@
+import logging as log
+import os
+from typing import Callable, Dict, List
+
+from .ksp_version import KspVersion
+from .validator import DEFAULT_MAX_WORKERS, LatestKspVersion, get_schema, validate_cwd
+from .versionfile import compile_schema
+
+
+def validate_repositories(roots: List[str], exclude='', schema=None, build_map=None,
+                          max_workers=DEFAULT_MAX_WORKERS, use_git=False, latest_ksp: KspVersion = None,
+                          processes=1, all_errors=False,
+                          on_done: Callable[[str, tuple], None] = None) -> Dict[str, tuple]:
+    """Validates the version files of many repositories one after another, like validate_cwd() in each of them.
+
+    The schema is downloaded and compiled once, and the latest KSP version is looked up at most once for all of them.
+    Downloads share the HTTP session set up by setup_http().
+
+    :param roots: The root directories of the repositories.
+    :param exclude: A string formatted as JSON array containing files or directories to exclude, in every repository.
+    :param schema: A **valid** Python object representing the schema. Use sparingly, intended for tests!
+    :param build_map: A **valid** Python object representing the build map. Use sparingly, intended for tests!
+    :param max_workers: The maximum number of remote version files to download in parallel.
+    :param use_git: Ask 'git ls-files' for the version files instead of walking the directory tree.
+    :param latest_ksp: Check compatibility with this KSP version instead of the latest one from the build map.
+    :param processes: Parse and validate the files in this many processes, for very large numbers of files.
+    :param all_errors: Report all schema errors of each file instead of only the most relevant one.
+    :param on_done: Called with the root and the result of each repository, while it's still the working directory.
+    :return: The 4-tuple of validate_cwd() for each root.
+    :rtype: Dict[str, (int, Set[Path], Set[Path], Set[Path])]
+    """
+    if schema is None:
+        schema = get_schema()
+    import jsonschema
+    try:
+        schema_validator = compile_schema(schema) if schema is not None else None
+    except jsonschema.SchemaError as e:
+        log.error(f'The current schema is invalid itself, that\'s unfortunate... {e}')
+        schema_validator = None
+    if schema_validator is None:
+        return {root: (1, set(), set(), set()) for root in roots}
+    latest_ksp = LatestKspVersion(latest_ksp, build_map)
+
+    results = {}
+    old_cwd = os.getcwd()
+    for root in roots:
+        log.info(f'Validating repository {root}')
+        try:
+            os.chdir(root)
+        except OSError as e:
+            log.error(f'Can\'t enter repository {root}: {e}')
+            results[root] = (1, set(), set(), set())
+            continue
+        try:
+            results[root] = validate_cwd(exclude, schema_validator, max_workers=max_workers, use_git=use_git,
+                                         latest_ksp=latest_ksp, processes=processes, all_errors=all_errors)
+            if on_done:
+                on_done(root, results[root])
+        finally:
+            os.chdir(old_cwd)
+    return results
+
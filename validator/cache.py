@@ -0,0 +1,293 @@
+import functools
+import hashlib
+import json
+import logging as log
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from . import http
+from .utils import write_text_atomic
+from .versionfile import VersionFile
+
+# How long the results of remote version files are reused before they are validated in full again, in seconds.
+DEFAULT_REMOTE_TTL = 24 * 60 * 60
+# How many remote version files the remote cache remembers at most.
+DEFAULT_REMOTE_MAX_ENTRIES = 5000
+REMOTE_CACHE_FORMAT = 2
+# The only values of a remote version file the checks look at after validating it.
+_REMOTE_FIELDS = ('URL', 'KSP_VERSION', 'KSP_VERSION_MIN', 'KSP_VERSION_MAX')
+
+
+def __getattr__(name):
+    # OfflineCacheMiss is a requests exception, it's only created when used to avoid importing requests at startup.
+    if name == 'OfflineCacheMiss':
+        return _offline_cache_miss_class()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+@functools.lru_cache(maxsize=None)
+def _offline_cache_miss_class():
+    import requests
+
+    class OfflineCacheMiss(requests.exceptions.RequestException):
+        """Raised in offline mode if a URL is requested that hasn't been cached before."""
+
+    OfflineCacheMiss.__module__ = __name__
+    return OfflineCacheMiss
+
+
+class DownloadCache:
+    """Stores downloaded files on disk, together with their ETag and Last-Modified headers.
+
+    Cached files are revalidated using conditional requests, the cached body is reused if the server answers with
+    304 Not Modified. In offline mode, only the cached copies are used, without any network traffic.
+    """
+
+    def __init__(self, directory: Path, offline=False):
+        self.directory = directory
+        self.offline = offline
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def fetch(self, url: str) -> str:
+        key = hashlib.sha256(url.encode()).hexdigest()
+        meta_path = self.directory / f'{key}.json'
+        body_path = self.directory / f'{key}.body'
+
+        meta = self._load_meta(meta_path) if body_path.is_file() else None
+
+        if self.offline:
+            if meta is None:
+                raise _offline_cache_miss_class()(f'{url} is not cached, can\'t download it in offline mode.')
+            log.debug('Using cached %s (offline)', url)
+            return body_path.read_text(encoding='utf-8')
+
+        headers = {}
+        if meta is not None:
+            if etag := meta.get('etag'):
+                headers['If-None-Match'] = etag
+            if last_modified := meta.get('last_modified'):
+                headers['If-Modified-Since'] = last_modified
+
+        response = http.get(url, headers=headers)
+        if response.status_code == 304 and meta is not None:
+            log.debug('Cached %s is still up to date', url)
+            return body_path.read_text(encoding='utf-8')
+        response.raise_for_status()
+
+        log.debug('Caching %s', url)
+        write_text_atomic(body_path, response.text)
+        write_text_atomic(meta_path, json.dumps({
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }))
+        return response.text
+
+    @staticmethod
+    def _load_meta(meta_path: Path) -> Optional[dict]:
+        try:
+            return json.loads(meta_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+
+
+class RemoteResultCache:
+    """Remembers the remote version files of earlier runs and the result of validating them.
+
+    Entries are keyed on the raw URI and store the ETag and Last-Modified headers, the hash of the body, the few values
+    the checks need and the validation errors. Remotes are requested conditionally, if the server answers with
+    304 Not Modified or sends the same body again, they are neither parsed nor validated again.
+    Results are only reused with the same schema. Entries older than ttl seconds are downloaded and validated in full
+    again, and only the max_entries most recently used ones are saved.
+    In offline mode, the entries are used no matter their age, and nothing is downloaded.
+    """
+
+    def __init__(self, path: Path, ttl=DEFAULT_REMOTE_TTL, max_entries=DEFAULT_REMOTE_MAX_ENTRIES, offline=False):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.offline = offline
+        self._entries: Dict[str, dict] = {}
+        # Entries created or used since the last take_updates(), for the worker processes to send to the parent.
+        self._updates: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+        try:
+            data = json.loads(path.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            log.debug('Ignoring unreadable remote cache %s: %s', path, e)
+            return
+        if data.get('format') == REMOTE_CACHE_FORMAT:
+            self._entries = data.get('entries', {})
+
+    def fetch(self, raw_uri: str, path: Path, schema_validator, schema_hash: str) -> VersionFile:
+        """Downloads the remote version file at raw_uri, and validates it unless the result is known already.
+
+        :param path: The path of the local version file that points to it.
+        :param schema_validator: The validator from compile_schema() to validate it with.
+        :param schema_hash: The hash_json() of its schema.
+        :return: A compact VersionFile that is validated with schema_validator already.
+        :raises requests.exceptions.RequestException: If the download failed, or in offline mode (OfflineCacheMiss).
+        :raises json.decoder.JSONDecodeError: If the downloaded file isn't valid JSON.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(raw_uri)
+        if self.offline:
+            if entry is None or entry.get('schema') != schema_hash:
+                raise _offline_cache_miss_class()(f'Remote version file {raw_uri} is not cached, '
+                                                  f'can\'t download it in offline mode.')
+            log.debug('Using the previous result of remote %s (offline)', raw_uri)
+            with self._lock:
+                self._entries[raw_uri] = self._updates[raw_uri] = dict(entry, used=now)
+            return self._restore(entry, path, schema_validator)
+        if entry is not None and (entry.get('schema') != schema_hash or now - entry.get('stored', 0) > self.ttl):
+            entry = None
+
+        headers = {}
+        if entry is not None:
+            if etag := entry.get('etag'):
+                headers['If-None-Match'] = etag
+            if last_modified := entry.get('last_modified'):
+                headers['If-Modified-Since'] = last_modified
+
+        log.debug('Fetching remote %s...', raw_uri)
+        response = http.get(raw_uri, headers=headers)
+        if response.status_code == 304 and entry is not None:
+            log.debug('Remote %s is not modified, reusing its previous result', raw_uri)
+            version_file = self._restore(entry, path, schema_validator)
+        else:
+            response.raise_for_status()
+            body_hash = hashlib.sha256(response.content).hexdigest()
+            if entry is not None and entry.get('sha256') == body_hash:
+                log.debug('Remote %s is unchanged, reusing its previous result', raw_uri)
+                version_file = self._restore(entry, path, schema_validator)
+            else:
+                (version_file, entry) = self._validate(response.text, path, schema_validator, schema_hash, now)
+                entry['sha256'] = body_hash
+            entry = dict(entry, etag=response.headers.get('ETag', entry.get('etag')),
+                         last_modified=response.headers.get('Last-Modified', entry.get('last_modified')))
+
+        entry = dict(entry, used=now)
+        with self._lock:
+            self._entries[raw_uri] = self._updates[raw_uri] = entry
+        return version_file
+
+    @staticmethod
+    def _validate(text: str, path: Path, schema_validator, schema_hash: str, now: float):
+        import jsonschema
+
+        version_file = VersionFile(text, path, compact=True)
+        fields = {key: version_file.json.get(key) for key in _REMOTE_FIELDS if key in version_file.json}
+        try:
+            version_file.validate(schema_validator)
+            (error, errors) = (None, [])
+        except jsonschema.ValidationError as e:
+            (error, errors) = (_error_to_dict(e), [_error_to_dict(error) for error in version_file.validation_errors])
+        return version_file, {'schema': schema_hash, 'stored': now, 'fields': fields, 'error': error, 'errors': errors}
+
+    @staticmethod
+    def _restore(entry: dict, path: Path, schema_validator) -> VersionFile:
+        # Only the remembered values, the checks don't look at anything else.
+        version_file = VersionFile(json.dumps(entry['fields']), path, compact=True)
+        error = _error_from_dict(entry['error']) if entry.get('error') is not None else None
+        version_file.assume_validated(schema_validator, error, [_error_from_dict(e) for e in entry.get('errors', [])])
+        return version_file
+
+    def take_updates(self) -> Dict[str, dict]:
+        """Returns the entries created or used since the last call, see update()."""
+        with self._lock:
+            (updates, self._updates) = (self._updates, {})
+        return updates
+
+    def update(self, entries: Dict[str, dict]):
+        """Adds the entries of another cache for the same path, like one in a worker process."""
+        with self._lock:
+            self._entries.update(entries)
+            self._updates.update(entries)
+
+    def save(self):
+        """Writes the entries to disk, without the expired and the least recently used ones beyond max_entries."""
+        now = time.time()
+        with self._lock:
+            # Expired entries are still the best there is in offline mode.
+            entries = [(url, entry) for (url, entry) in self._entries.items()
+                       if self.offline or now - entry.get('stored', 0) <= self.ttl]
+            entries.sort(key=lambda item: item[1].get('used', 0), reverse=True)
+            self._entries = dict(entries[:self.max_entries])
+            data = {'format': REMOTE_CACHE_FORMAT, 'entries': self._entries}
+            try:
+                write_text_atomic(self.path, json.dumps(data))
+            except OSError as e:
+                log.warning(f'Could not save the remote cache {self.path}: {e}')
+
+
+# The message keeps the details of the original error, the paths are needed to sort and tell the errors apart.
+def _error_to_dict(error) -> dict:
+    return {'message': str(error), 'path': list(error.absolute_path), 'schema_path': list(error.absolute_schema_path)}
+
+
+def _error_from_dict(error: dict):
+    import jsonschema
+    return jsonschema.ValidationError(error['message'], path=error['path'], schema_path=error['schema_path'])
+
+
+_download_cache: Optional[DownloadCache] = None
+_remote_results: Optional[RemoteResultCache] = None
+_settings = {'directory': None}
+
+
+def setup_cache(directory, offline=False, remote_ttl=DEFAULT_REMOTE_TTL, remote_max_entries=DEFAULT_REMOTE_MAX_ENTRIES):
+    """Sets up the download cache used by fetch_text(), and the remote cache returned by get_remote_results().
+
+    :param directory: The directory to store the cached files in. Empty or None disables caching.
+                      Relative to the current working directory, even if it changes later (like in batch mode).
+    :param offline: Only use cached files, never access the network.
+    :param remote_ttl: Seconds to reuse the results of remote version files for, 0 to not remember them.
+    :param remote_max_entries: The maximum number of remote version files to remember.
+    """
+    global _download_cache, _remote_results, _settings
+    if not directory:
+        if offline:
+            raise ValueError('The offline mode requires a cache directory.')
+        _download_cache = None
+        _remote_results = None
+        _settings = {'directory': None}
+        return
+    directory = Path(directory).resolve()
+    _settings = {'directory': str(directory), 'offline': offline,
+                 'remote_ttl': remote_ttl, 'remote_max_entries': remote_max_entries}
+    _download_cache = DownloadCache(directory, offline)
+    _remote_results = RemoteResultCache(directory / 'remotes.json', remote_ttl, remote_max_entries, offline) \
+        if remote_ttl > 0 else None
+    log.debug(f'Using download cache at {directory}{" (offline)" if offline else ""}')
+
+
+def get_settings() -> dict:
+    """Returns the arguments of the last setup_cache() call, to set up the same in another process."""
+    return dict(_settings)
+
+
+def is_offline() -> bool:
+    """Whether setup_cache() was called with offline=True, nothing may be downloaded then."""
+    return _download_cache is not None and _download_cache.offline
+
+
+def get_remote_results() -> Optional[RemoteResultCache]:
+    return _remote_results
+
+
+def fetch_text(url: str) -> str:
+    """Downloads the given URL, through the download cache if one is set up.
+
+    :raises requests.exceptions.RequestException: If the download failed or the file isn't cached in offline mode.
+    """
+    if _download_cache is not None:
+        return _download_cache.fetch(url)
+    response = http.get(url)
+    response.raise_for_status()
+    return response.text
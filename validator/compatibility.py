@@ -0,0 +1,288 @@
+import argparse
+import json
+import logging as log
+import math
+import sys
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .ksp_version import KspVersion
+from .versionfile import VersionFile
+
+
+class CompatibilityMatrix:
+    """Which KSP builds each of many version files is compatible with, computed for all of them at once.
+
+    The builds are encoded as the columns of the matrix, sorted by their version. The builds a version file is
+    compatible with are then one interval of columns, plus the builds whose version is equal to the start of
+    KSP_VERSION_MIN or KSP_VERSION because it has fewer parts (a.b equals a.b.c).
+    Each row is found with a few binary searches and filled as one slice, instead of comparing every pair.
+    The results are the same as those of VersionFile.is_compatible_with_ksp().
+    """
+
+    def __init__(self, version_files: Sequence[VersionFile], builds: Dict[str, KspVersion]):
+        """
+        :param version_files: The version files, one row each.
+        :param builds: The KSP versions by build ID, one column each. See builds_of().
+        """
+        # sorted() is stable, builds with the same version keep the order of the build map.
+        self.build_ids: List[str] = sorted(builds, key=lambda build_id: builds[build_id].sort_key)
+        self.versions: List[KspVersion] = [builds[build_id] for build_id in self.build_ids]
+        self.files: List[Path] = [version_file.path for version_file in version_files]
+        self._keys = [version.sort_key for version in self.versions]
+        self.rows: List[bytearray] = [self._row(version_file) for version_file in version_files]
+
+    def is_compatible(self, file_index: int, build_index: int) -> bool:
+        return bool(self.rows[file_index][build_index])
+
+    def compatible_builds(self, file_index: int) -> List[str]:
+        row = self.rows[file_index]
+        return [build_id for (build_id, compatible) in zip(self.build_ids, row) if compatible]
+
+    def to_dict(self) -> dict:
+        """The matrix with the builds in column order, and a string of 0s and 1s for every file."""
+        return {
+            'builds': [{'id': build_id, 'version': str(version)}
+                       for (build_id, version) in zip(self.build_ids, self.versions)],
+            'files': {str(f): row.translate(_ROW_CHARS).decode('ascii') for (f, row) in zip(self.files, self.rows)}
+        }
+
+    def _row(self, version_file: VersionFile) -> bytearray:
+        row = bytearray(len(self._keys))
+        if version_file.is_compatible_with_any_ksp():
+            row[:] = b'\x01' * len(row)
+            return row
+        if (bounds := self._bounds(version_file)) is None:
+            return row
+        (start, end, extras) = bounds
+        if start < end:
+            row[start:end] = b'\x01' * (end - start)
+        for i in extras:
+            if i < end:
+                row[i] = 1
+        return row
+
+    def _bounds(self, version_file: VersionFile) -> Optional[Tuple[int, int, List[int]]]:
+        # Same rules as KspVersion.is_contained_in(): MIN and MAX win over KSP_VERSION, which has to be equal.
+        vmin = version_file.ksp_version_min
+        vmax = version_file.ksp_version_max
+        if vmin or vmax:
+            (start, extras) = self._lower_bound(vmin) if vmin else (0, [])
+            end = self._upper_bound(vmax) if vmax else len(self._keys)
+            return start, end, extras
+        if version := version_file.ksp_version:
+            (start, extras) = self._lower_bound(version)
+            return start, self._upper_bound(version), extras
+        return None
+
+    def _lower_bound(self, version: KspVersion) -> Tuple[int, List[int]]:
+        # All builds from the first one sorting after the version are greater or equal,
+        # as well as those with a shorter version equal to the start of it, which sort before.
+        key = version.sort_key
+        extras = []
+        for length in range(2, len(key)):
+            extras.extend(range(bisect_left(self._keys, key[:length]), bisect_right(self._keys, key[:length])))
+        return bisect_left(self._keys, key), extras
+
+    def _upper_bound(self, version: KspVersion) -> int:
+        # Builds with a longer version that starts with this one are equal, they sort right after it.
+        key = version.sort_key
+        return bisect_left(self._keys, key[:-1] + (key[-1] + 1,))
+
+
+class CompatibilityIndex:
+    """Answers which of many version files are compatible with a KSP version, without asking every one of them.
+
+    Every KSP version v stands for the interval [v.sort_key, _upper(v.sort_key)) of sort keys, which contains all
+    versions equal to it (a.b contains a.b.c). A version file stands for [KSP_VERSION_MIN, _upper(KSP_VERSION_MAX)),
+    or the interval of KSP_VERSION. A version file is compatible with a version exactly if their intervals overlap,
+    so an interval tree finds them in logarithmic time plus the number of results.
+    The results are the same as those of VersionFile.is_compatible_with_ksp(). Files with 'any' match everything.
+    """
+
+    def __init__(self, version_files: Sequence[VersionFile]):
+        self.version_files = list(version_files)
+        self._any = []
+        intervals = []
+        # Ranges with KSP_VERSION_MIN > KSP_VERSION_MAX, which can still overlap a version equal to both.
+        self._inverted = []
+        for (i, version_file) in enumerate(self.version_files):
+            if version_file.is_compatible_with_any_ksp():
+                self._any.append(i)
+            elif (interval := _interval_of(version_file)) is not None:
+                (intervals if interval[0] < interval[1] else self._inverted).append((*interval, i))
+        self._tree = _IntervalNode.build(intervals)
+
+    def compatible_with(self, version: KspVersion) -> List[VersionFile]:
+        """Returns the version files compatible with the given version, in the order they were given."""
+        if version.any:
+            return list(self.version_files)
+        return self._files(self._overlapping(version.sort_key, _upper(version.sort_key)))
+
+    def compatible_with_range(self, vmin: KspVersion, vmax: KspVersion) -> List[VersionFile]:
+        """Returns the version files compatible with at least one version from vmin to vmax.
+
+        A shorter version like a.b is only part of the range if all of a.b.x is, as it's equal to all of them.
+        'any' leaves the range open at that end.
+        """
+        low = _LOWEST if vmin.any else vmin.sort_key
+        high = _HIGHEST if vmax.any else _upper(vmax.sort_key)
+        if low >= high:
+            return []
+        return self._files(self._overlapping(low, high))
+
+    def gaps(self, versions: Iterable[KspVersion]) -> List[KspVersion]:
+        """Returns the given versions no version file is compatible with, like the builds of the build map."""
+        if self._any:
+            return []
+        return [v for v in versions
+                if not v.any and next(self._overlapping(v.sort_key, _upper(v.sort_key)), None) is None]
+
+    def _overlapping(self, low: tuple, high: tuple) -> Iterator[int]:
+        yield from self._any
+        if self._tree is not None:
+            yield from self._tree.overlapping(low, high)
+        for (start, end, i) in self._inverted:
+            # Only the shorter versions KSP_VERSION_MIN starts with can be equal to both ends, like a.b for a.b.c.
+            if any(prefix < end and low <= prefix and _upper(prefix) <= high
+                   for prefix in (start[:length] for length in range(2, len(start) + 1))):
+                yield i
+
+    def _files(self, indices: Iterable[int]) -> List[VersionFile]:
+        return [self.version_files[i] for i in sorted(indices)]
+
+
+class _IntervalNode:
+    # A centered interval tree of half-open intervals (start, end, index) with start < end.
+
+    def __init__(self, center: tuple, by_start: list, by_end: list, left, right):
+        self.center = center
+        self.by_start = by_start
+        self.by_end = by_end
+        self.left = left
+        self.right = right
+
+    @classmethod
+    def build(cls, intervals: list) -> Optional['_IntervalNode']:
+        if not intervals:
+            return None
+        # The median start keeps at least one interval here and at most half of them on either side.
+        starts = sorted(interval[0] for interval in intervals)
+        center = starts[len(starts) // 2]
+        here = [interval for interval in intervals if interval[0] <= center < interval[1]]
+        return cls(center,
+                   sorted(here, key=lambda interval: interval[0]),
+                   sorted(here, key=lambda interval: interval[1], reverse=True),
+                   cls.build([interval for interval in intervals if interval[1] <= center]),
+                   cls.build([interval for interval in intervals if interval[0] > center]))
+
+    def overlapping(self, low: tuple, high: tuple) -> Iterator[int]:
+        # All intervals of this node contain the center, so only one of their ends needs to be checked.
+        if high <= self.center:
+            for (start, _, i) in self.by_start:
+                if start >= high:
+                    break
+                yield i
+            if self.left is not None:
+                yield from self.left.overlapping(low, high)
+        elif low > self.center:
+            for (_, end, i) in self.by_end:
+                if end <= low:
+                    break
+                yield i
+            if self.right is not None:
+                yield from self.right.overlapping(low, high)
+        else:
+            yield from (i for (_, _, i) in self.by_start)
+            if self.left is not None:
+                yield from self.left.overlapping(low, high)
+            if self.right is not None:
+                yield from self.right.overlapping(low, high)
+
+
+# Sort keys before and after all others.
+_LOWEST = ()
+_HIGHEST = (math.inf,)
+
+
+def _upper(key: tuple) -> tuple:
+    # The first sort key after all the ones starting with key, like a.c for a.b.
+    return key[:-1] + (key[-1] + 1,)
+
+
+def _interval_of(version_file: VersionFile) -> Optional[Tuple[tuple, tuple]]:
+    # Same rules as KspVersion.is_contained_in(): MIN and MAX win over KSP_VERSION.
+    vmin = version_file.ksp_version_min
+    vmax = version_file.ksp_version_max
+    if vmin or vmax:
+        return (vmin.sort_key if vmin else _LOWEST), (_upper(vmax.sort_key) if vmax else _HIGHEST)
+    if version := version_file.ksp_version:
+        return version.sort_key, _upper(version.sort_key)
+    return None
+
+
+_ROW_CHARS = bytes.maketrans(b'\x00\x01', b'01')
+
+
+def builds_of(build_map: dict) -> Dict[str, KspVersion]:
+    """Returns the KSP versions of the build map by build ID, skipping malformed ones."""
+    builds = {}
+    for (build_id, version) in build_map.get('builds', {}).items():
+        if (ksp_version := KspVersion.try_parse(version)) is not None:
+            builds[build_id] = ksp_version
+        else:
+            log.debug(f'Skipping build {build_id} with malformed version {version}')
+    return builds
+
+
+def load_version_files(paths: List[Path]) -> List[VersionFile]:
+    """Loads the given version files, and all version files below the given directories. Invalid JSON is skipped."""
+    from .validator import find_version_files
+
+    files = []
+    for path in paths:
+        files.extend(sorted(find_version_files(path)) if path.is_dir() else [path])
+    version_files = []
+    for f in files:
+        try:
+            version_files.append(VersionFile(f.read_text(encoding='utf-8'), f))
+        except (OSError, ValueError) as e:
+            log.warning(f'Skipping {f}: {e}')
+    return version_files
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m validator.compatibility',
+                                     description='Writes which KSP builds each version file is compatible with.')
+    parser.add_argument('paths', nargs='*', type=Path, default=[Path()],
+                        help='version files, or directories to search for version files (default: .)')
+    parser.add_argument('--build-map', type=Path, help='read the build map from this file instead of downloading it')
+    parser.add_argument('--output', type=Path, help='write the JSON matrix to this file instead of stdout')
+    parser.add_argument('--gaps', action='store_true',
+                        help='only write the builds none of the version files is compatible with')
+    args = parser.parse_args()
+
+    if args.build_map:
+        build_map = json.loads(args.build_map.read_text(encoding='utf-8'))
+    else:
+        from .validator import get_build_map
+        if (build_map := get_build_map()) is None:
+            sys.exit('Downloading the build map failed.')
+
+    version_files = load_version_files(args.paths)
+    builds = builds_of(build_map)
+    if args.gaps:
+        index = CompatibilityIndex(version_files)
+        output = json.dumps([{'id': build_id, 'version': str(version)}
+                             for (build_id, version) in builds.items() if index.gaps([version])], indent=2)
+    else:
+        output = json.dumps(CompatibilityMatrix(version_files, builds).to_dict(), indent=2)
+    if args.output:
+        args.output.write_text(output + '\n', encoding='utf-8')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+import logging as log
+import os
+import re
+from pathlib import PurePath
+from typing import Iterable, List, Optional
+
+from .utils import parse_json_array
+
+
+class ExclusionMatcher:
+    """Matches paths against a list of glob patterns, following the rules of pathlib.Path.glob().
+
+    All patterns are compiled into one regular expression for files, so checking a path costs the same no matter how
+    many patterns there are. A second one matches directories whose whole content is excluded by a pattern ending
+    with '**/*', those don't need to be searched for files to validate.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        file_rgxs = []
+        subtree_rgxs = []
+        for pattern in patterns:
+            parts = _split_pattern(pattern)
+            if parts is None:
+                continue
+            # Like Path.glob(), a trailing '**' only matches directories.
+            if parts[-1] != '**':
+                file_rgxs.append(_translate(parts))
+            if parts[-2:] == ['**', '*']:
+                subtree_rgxs.append(_translate_subtree(parts[:-2]))
+
+        flags = re.IGNORECASE if os.name == 'nt' else 0
+        self._file_rgx = re.compile('|'.join(file_rgxs), flags) if file_rgxs else None
+        self._subtree_rgx = re.compile('|'.join(subtree_rgxs), flags) if subtree_rgxs else None
+
+    @classmethod
+    def from_json(cls, exclude: str):
+        """Creates a matcher from a string formatted as JSON array, like the 'exclude' input."""
+        if exclude and not exclude.isspace():
+            return cls(parse_json_array(exclude))
+        return cls([])
+
+    def matches(self, path: PurePath) -> bool:
+        """Whether the given file, relative to the working directory, is excluded."""
+        return self._file_rgx is not None and self._file_rgx.fullmatch(path.as_posix()) is not None
+
+    def excludes_subtree(self, directory: PurePath) -> bool:
+        """Whether every file below the given directory, relative to the working directory, is excluded."""
+        return self._subtree_rgx is not None and self._subtree_rgx.fullmatch(directory.as_posix()) is not None
+
+
+def _split_pattern(pattern) -> Optional[List[str]]:
+    if not isinstance(pattern, str) or not pattern:
+        log.warning(f'Ignoring invalid exclusion {pattern!r}')
+        return None
+    path = PurePath(pattern)
+    if path.anchor:
+        log.warning(f'Ignoring exclusion {pattern}, only relative paths are supported.')
+        return None
+    # PurePath already dropped '.' components and duplicate slashes.
+    parts = list(path.parts)
+    return parts if parts else None
+
+
+def _translate(parts: List[str]) -> str:
+    rgx = ''
+    for i, part in enumerate(parts):
+        if part == '**':
+            # This directory and all subdirectories, recursively.
+            rgx += '(?:[^/]+/)*'
+        else:
+            rgx += _translate_part(part)
+            if i < len(parts) - 1:
+                rgx += '/'
+    return f'(?:{rgx})'
+
+
+def _translate_subtree(prefix: List[str]) -> str:
+    while prefix and prefix[-1] == '**':
+        prefix = prefix[:-1]
+    if not prefix:
+        return '(?:[^/]+(?:/[^/]+)*)'
+    return f'(?:{_translate(prefix)}(?:/[^/]+)*)'
+
+
+# Like fnmatch.translate(), but wildcards never match a '/'.
+def _translate_part(part: str) -> str:
+    rgx = ''
+    i, n = 0, len(part)
+    while i < n:
+        c = part[i]
+        i += 1
+        if c == '*':
+            rgx += '[^/]*'
+        elif c == '?':
+            rgx += '[^/]'
+        elif c == '[':
+            j = i
+            if j < n and part[j] == '!':
+                j += 1
+            if j < n and part[j] == ']':
+                j += 1
+            j = part.find(']', j)
+            if j == -1:
+                rgx += re.escape(c)
+            else:
+                chars = part[i:j].replace('\\', '\\\\')
+                i = j + 1
+                if chars.startswith('!'):
+                    chars = '^/' + chars[1:]
+                elif chars.startswith('^'):
+                    chars = '\\' + chars
+                rgx += f'[{chars}]'
+        else:
+            rgx += re.escape(c)
+    return rgx
@@ -0,0 +1,87 @@
+import logging as log
+import threading
+import time
+from typing import TYPE_CHECKING, Optional
+
+from . import timing
+
+if TYPE_CHECKING:
+    import requests
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_RETRIES = 3
+DEFAULT_POOL_SIZE = 10
+
+# Responses that are worth trying again after a short break.
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_session: Optional['requests.Session'] = None
+_settings = {'timeout': DEFAULT_TIMEOUT, 'retries': DEFAULT_RETRIES, 'pool_size': DEFAULT_POOL_SIZE, 'mirror': ''}
+_lock = threading.Lock()
+
+
+def setup_http(timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, pool_size=DEFAULT_POOL_SIZE, mirror=''):
+    """Sets up the session shared by all outbound requests.
+
+    Connections are kept alive and reused for further requests to the same host.
+
+    :param timeout: Seconds to wait for the server to accept the connection or send data, before giving up.
+    :param retries: How often to retry a request after connection errors or a response with one of
+                    RETRY_STATUS_CODES, with exponentially growing breaks in between (honoring Retry-After).
+    :param pool_size: The maximum number of simultaneous connections per host.
+    :param mirror: Answer all requests from this mirror directory or stand-in server URL instead of the internet,
+                   see MirrorAdapter. Empty to access the internet.
+    """
+    global _session, _settings
+    with _lock:
+        if _session is not None:
+            _session.close()
+        # Created on first use, importing requests takes a while and isn't needed by every run.
+        _session = None
+        _settings = {'timeout': timeout, 'retries': retries, 'pool_size': pool_size, 'mirror': mirror}
+    log.debug(f'HTTP session set up with timeout {timeout}s, {retries} retries and {pool_size} connections per host'
+              f'{f", using the mirror {mirror}" if mirror else ""}')
+
+
+def get_settings() -> dict:
+    """Returns the arguments of the last setup_http() call, to set up the same in another process."""
+    return dict(_settings)
+
+
+def get_session() -> 'requests.Session':
+    """Returns the shared session, set up with the defaults if setup_http() hasn't been called yet."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = _create_session(_settings['retries'], _settings['pool_size'], _settings['mirror'])
+        return _session
+
+
+def get(url: str, **kwargs) -> 'requests.Response':
+    """Like requests.get(), but using the shared session and the configured timeout."""
+    kwargs.setdefault('timeout', _settings['timeout'])
+    start = time.perf_counter()
+    response = None
+    try:
+        response = get_session().get(url, **kwargs)
+        return response
+    finally:
+        timing.add_download(url, len(response.content) if response is not None else 0,
+                            time.perf_counter() - start, response.status_code if response is not None else None)
+
+
+def _create_session(retries, pool_size, mirror='') -> 'requests.Session':
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=RETRY_STATUS_CODES,
+                  allowed_methods=frozenset({'GET', 'HEAD'}), raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True, max_retries=retry)
+    if mirror:
+        from .mirror import MirrorAdapter
+        adapter = MirrorAdapter(mirror, adapter)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import logging as log
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+
+from . import results
+from .ksp_version import KspVersion
+from .utils import hash_json, write_text_atomic
+
+MANIFEST_FORMAT = 2
+
+
+class Manifest:
+    """Remembers the results of previous runs, so that unchanged version files don't have to be checked again.
+
+    Each entry is keyed on the hash of the file content, and also stores the warnings and errors that were logged while
+    checking it, so they can be emitted again. All entries are dropped if the schema, the latest KSP version or
+    all_errors changed.
+    Note that remote version files are not fetched again for unchanged files, their warnings are replayed as well,
+    and so is the status of their remote if results are collected.
+    Only the entries of the files that were looked up in this run are saved, so deleted files don't pile up.
+    """
+
+    def __init__(self, path: Path, schema: dict, latest_ksp: Optional[KspVersion], all_errors=False):
+        self.path = path
+        self.schema_hash = hash_json(schema)
+        self.latest_ksp = str(latest_ksp) if latest_ksp is not None else None
+        self.all_errors = all_errors
+        self.files = {}
+        self._seen = set()
+
+        try:
+            data = json.loads(path.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            log.debug(f'Ignoring unreadable manifest {path}: {e}')
+            return
+        if not isinstance(data, dict):
+            log.debug(f'Ignoring malformed manifest {path}')
+            return
+        if data.get('format') != MANIFEST_FORMAT or data.get('schema') != self.schema_hash \
+                or data.get('latest_ksp') != self.latest_ksp or data.get('all_errors') != self.all_errors:
+            log.debug('Schema, latest KSP version or all_errors changed, checking all files again.')
+            return
+        if isinstance(files := data.get('files'), dict):
+            self.files = files
+
+    def lookup(self, f: Path, content_hash: str) -> Optional[dict]:
+        self._seen.add(str(f))
+        entry = self.files.get(str(f))
+        if not isinstance(entry, dict) or entry.get('hash') != content_hash:
+            return None
+        if results.get_results() is not None and 'remote' not in entry:
+            # Checked while no results were collected, the status of the remote is unknown.
+            return None
+        return entry
+
+    def check(self, f: Path, content_hash: str, check: Callable[[], bool]) -> bool:
+        """Runs check() while recording all warnings and errors it logs, and stores the result for the next run."""
+        collector = _RecordCollector()
+        root_logger = log.getLogger()
+        root_logger.addHandler(collector)
+        try:
+            valid = check()
+        finally:
+            root_logger.removeHandler(collector)
+        self._seen.add(str(f))
+        entry = self.files[str(f)] = {'hash': content_hash, 'valid': valid, 'records': collector.records}
+        if (run_results := results.get_results()) is not None:
+            entry['remote'] = run_results.get_remote_status(f)
+        return valid
+
+    def save(self):
+        """Writes the manifest. Failing to do so is only logged, the next run just checks all files again."""
+        try:
+            write_text_atomic(self.path, json.dumps({
+                'format': MANIFEST_FORMAT,
+                'schema': self.schema_hash,
+                'latest_ksp': self.latest_ksp,
+                'all_errors': self.all_errors,
+                'files': {f: entry for (f, entry) in self.files.items() if f in self._seen}
+            }))
+        except OSError as e:
+            log.warning(f'Failed saving the manifest {self.path}: {e}')
+
+
+def replay(f: Path, entry: dict) -> bool:
+    """Logs the recorded warnings and errors of an unchanged file again and returns its previous result."""
+    log.info('%s is unchanged, reusing the previous result', f)
+    for record in entry.get('records', []):
+        if record['line'] is None:
+            log.log(record['level'], record['msg'])
+        else:
+            log.log(record['level'], record['msg'], extra={'file': f, 'line': record['line'], 'col': record['col']})
+    if (remote_status := entry.get('remote')) is not None:
+        results.set_remote_status(f, remote_status)
+    return entry.get('valid', False)
+
+
+def hash_file(f: Path) -> Optional[str]:
+    try:
+        return hashlib.sha256(f.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+class _RecordCollector(log.Handler):
+    # Only collects records of the thread that created it, remotes may be downloaded in other threads meanwhile.
+
+    def __init__(self):
+        super().__init__(log.WARNING)
+        self.thread = threading.get_ident()
+        self.records = []
+
+    def emit(self, record):
+        if record.thread != self.thread:
+            return
+        has_file = getattr(record, 'file', None) is not None
+        self.records.append({
+            'level': record.levelno,
+            'msg': record.getMessage(),
+            'line': getattr(record, 'line', 1) if has_file else None,
+            'col': getattr(record, 'col', 1) if has_file else None
+        })
@@ -1,49 +1,98 @@
 import re
-from functools import total_ordering
+import threading
+
+# Maximum number of parsed versions kept by KspVersion for reuse.
+INTERN_CACHE_SIZE = 4096
 
 
-@total_ordering
 class KspVersion:
+    """An immutable KSP version, either 'any' or MAJOR.MINOR[.PATCH[.BUILD]].
+
+    One specialty: a.b is always equal to a.b.c and a.b.c.d, and a missing or zero PATCH or BUILD is ignored.
+    That's why equal versions only need to agree on MAJOR and MINOR, which is all the hash depends on,
+    and why sort_key orders a.b before a.b.c even though they are equal.
+    Parsing the same string or dict again returns the same instance.
+    """
+    __slots__ = ('any', 'major', 'minor', 'patch', 'build', 'sort_key', '_hash')
+
     rgx = re.compile(r'^(?P<major>\d+)\.(?P<minor>\d+)(\.(?P<patch>\d+))?(\.(?P<build>\d+))?$')
 
+    _interned = {}
+    _intern_lock = threading.Lock()
+
     @classmethod
     def try_parse(cls, version):
         try:
             return KspVersion(version)
-        except:
+        except (TypeError, ValueError):
             return None
 
-    def __init__(self, version):
+    def __new__(cls, version):
+        intern_key = _intern_key(version)
+        if (interned := cls._interned.get(intern_key)) is not None:
+            return interned
+
         # Assume it's either 'any' or a semantic version according to the schema.
         if isinstance(version, str):
             if version == 'any':
-                self.any = True
-                return
+                self = cls._create(True, None, None, None, None)
             else:
-                self.any = False
-                match = self.rgx.fullmatch(version)
+                match = cls.rgx.fullmatch(version)
                 if match is None:
                     raise TypeError(f'Malformed KSP version: {version}')
-                self.major = int(match.group('major'))
-                self.minor = int(match.group('minor'))
-                self.patch = int(m) if (m := match.group('patch')) is not None else None
-                self.build = int(m) if (m := match.group('build')) is not None else None
+                self = cls._create(False, int(match.group('major')), int(match.group('minor')),
+                                   int(m) if (m := match.group('patch')) is not None else None,
+                                   int(m) if (m := match.group('build')) is not None else None)
 
         elif isinstance(version, dict):
-            self.any = False
             ma = version.get('MAJOR')
             mi = version.get('MINOR')
-            if ma and mi:
-                self.major = int(ma)
-                self.minor = int(mi)
-            else:
+            if not (ma and mi):
                 raise TypeError(f'A KSP version needs at least a MAJOR and MINOR: {version}')
-
-            self.patch = int(p) if (p := version.get('PATCH')) is not None else None
-            self.build = int(b) if (b := version.get('BUILD')) is not None else None
+            self = cls._create(False, int(ma), int(mi),
+                               int(p) if (p := version.get('PATCH')) is not None else None,
+                               int(b) if (b := version.get('BUILD')) is not None else None)
         else:
             raise TypeError(f'KSP version {version} is neither a well-formatted string nor a dict.')
 
+        if intern_key is not None:
+            with cls._intern_lock:
+                if len(cls._interned) >= INTERN_CACHE_SIZE:
+                    cls._interned.clear()
+                self = cls._interned.setdefault(intern_key, self)
+        return self
+
+    @classmethod
+    def _create(cls, any_version, major, minor, patch, build):
+        self = object.__new__(cls)
+        set_slot = object.__setattr__
+        set_slot(self, 'any', any_version)
+        set_slot(self, 'major', major)
+        set_slot(self, 'minor', minor)
+        set_slot(self, 'patch', patch)
+        set_slot(self, 'build', build)
+        # Only the parts up to the first missing or zero one count, see _compare().
+        if any_version:
+            key = ()
+        elif not patch:
+            key = (major, minor)
+        elif not build:
+            key = (major, minor, patch)
+        else:
+            key = (major, minor, patch, build)
+        set_slot(self, 'sort_key', key)
+        set_slot(self, '_hash', hash(key[:2]) if not any_version else hash('any'))
+        return self
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __reduce__(self):
+        return KspVersion._create, (self.any, self.major, self.minor, self.patch, self.build)
+
     # From AVC code:
     # (Ignoring KSP_INCLUDE_VERSIONS and KSP_EXCLUDE_VERSIONS)
     # If no ksp_version_min and no ksp_version_max are defined, return whether compatible with ksp_version
@@ -79,41 +128,71 @@ class KspVersion:
             return False
         return True
 
+    def __hash__(self):
+        return self._hash
+
     def __eq__(self, other):
-        return not self > other and not other > self
+        if not isinstance(other, KspVersion):
+            return NotImplemented
+        if self.any or other.any:
+            return self.any and other.any
+        return self._compare(other) == 0
 
     def __gt__(self, other):
-        # Thanks to the  regex we can assume everything is a int.
-        # We can also assume major and minor exist.
-        # One specialty: a.b is always equal to a.b.c and a.b.c.d
-        if self.major > other.major:
-            return True
-        elif self.major < other.major:
-            return False
-        if self.minor > other.minor:
-            return True
-        elif self.minor < other.minor:
-            return False
-        if self.patch and other.patch:
-            if self.patch > other.patch:
-                return True
-            elif self.patch < other.patch:
-                return False
-        else:
-            return False
-        if self.build and other.build:
-            if self.build > other.build:
-                return True
-            elif self.build < other.build:
-                return False
-            elif self.build == other.build:
-                return False
-        else:
-            return False
+        if not isinstance(other, KspVersion):
+            return NotImplemented
+        return self._compare(other) > 0
+
+    def __ge__(self, other):
+        if not isinstance(other, KspVersion):
+            return NotImplemented
+        return self._compare(other) >= 0
+
+    def __lt__(self, other):
+        if not isinstance(other, KspVersion):
+            return NotImplemented
+        return self._compare(other) < 0
+
+    def __le__(self, other):
+        if not isinstance(other, KspVersion):
+            return NotImplemented
+        return self._compare(other) <= 0
+
+    def _compare(self, other) -> int:
+        # Thanks to the regex we can assume everything is an int, and that major and minor exist.
+        # Only the parts both versions have are compared, so a.b is equal to a.b.c and a.b.c.d.
+        if self.any or other.any:
+            raise TypeError("The KSP version 'any' can't be ordered")
+        a = self.sort_key
+        b = other.sort_key
+        length = min(len(a), len(b))
+        if length < len(a):
+            a = a[:length]
+        if length < len(b):
+            b = b[:length]
+        return (a > b) - (a < b)
 
     def __str__(self):
+        if self.any:
+            return 'any'
         string = '' + str(self.major)
         string = string + '.' + str(self.minor)
         string = string + '.' + str(self.patch) if self.patch else string
         string = string + '.' + str(self.build) if self.build else string
         return string
+
+    def __repr__(self):
+        return f'KspVersion({str(self)!r})'
+
+
+def _intern_key(version):
+    if isinstance(version, str):
+        return version
+    if isinstance(version, dict):
+        key = (version.get('MAJOR'), version.get('MINOR'), version.get('PATCH'), version.get('BUILD'))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+    return None
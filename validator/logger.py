@@ -3,14 +3,37 @@ import sys
 from pathlib import Path
 
 
-def setup_logger(debug, logger_name=''):
+def setup_logger(debug, logger_name='', max_annotations=0):
+    """Logs to stdout in the format of GitHub workflow commands, so warnings and errors become annotations.
+
+    :param debug: Log debug messages as well.
+    :param logger_name: The logger to set up, the root logger by default.
+    :param max_annotations: Only turn this many warnings and this many errors into annotations, 0 for no limit.
+                            The rest is logged as plain lines.
+    """
     log = logging.getLogger(logger_name)
     level = logging.DEBUG if debug else logging.INFO
-    handler = logging.StreamHandler(sys.stdout)
-    handler.setFormatter(LogFormatter())
+    handler = BufferedStreamHandler(sys.stdout)
+    handler.setFormatter(LogFormatter(max_annotations))
     log.addHandler(handler)
     log.setLevel(level)
-    log.debug(f'Logger {logger_name} started with level {level}')
+    log.debug('Logger %s started with level %d', logger_name, level)
+
+
+class BufferedStreamHandler(logging.StreamHandler):
+    """A StreamHandler that leaves it to the stream when to write, instead of flushing after every record.
+
+    With thousands of version files, that saves a system call per line when stdout isn't a terminal.
+    Anything printed to the same stream still comes out in order. Flushed when logging shuts down at exit.
+    """
+
+    def emit(self, record):
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
 
 
 class LogExtra:
@@ -34,8 +57,11 @@ def _ensure_line_col(record):
         record.col = 1
 
 
-# https://stackoverflow.com/a/14859558
 class LogFormatter(logging.Formatter):
+    """Formats records as GitHub workflow commands, with one format for each level chosen up front.
+
+    Records with a file, line and col (see LogExtra) get formats that point GitHub to that place.
+    """
 
     dbg_fmt = "::DEBUG::%(msg)s"
     info_fmt = "::INFO::%(msg)s"
@@ -43,53 +69,58 @@ class LogFormatter(logging.Formatter):
     wrn_file_fmt = "::WARNING file=%(file)s,line=%(line)d,col=%(col)d::%(msg)s"
     err_fmt = "::ERROR::%(msg)s"
     err_file_fmt = "::ERROR file=%(file)s,line=%(line)d,col=%(col)d::%(msg)s"
-
-    def __init__(self):
-        super().__init__(fmt="%(levelno)d: %(msg)s", datefmt=None, style='%')
+    other_fmt = "%(levelno)d: %(msg)s"
+
+    # Used once max_annotations is reached, these don't create annotations.
+    wrn_plain_fmt = "Warning: %(msg)s"
+    wrn_file_plain_fmt = "Warning in %(file)s, line %(line)d, col %(col)d: %(msg)s"
+    err_plain_fmt = "Error: %(msg)s"
+    err_file_plain_fmt = "Error in %(file)s, line %(line)d, col %(col)d: %(msg)s"
+
+    def __init__(self, max_annotations=0):
+        """
+        :param max_annotations: Only format this many warnings and this many errors as annotations, 0 for no limit.
+                                GitHub only shows the first few of them anyway.
+        """
+        super().__init__(fmt=LogFormatter.other_fmt, datefmt=None, style='%')
+        self.max_annotations = max_annotations
+        # Level -> format without file, format with file (None if the level doesn't point to files).
+        self._formats = {
+            logging.DEBUG: (LogFormatter.dbg_fmt, None),
+            logging.INFO: (LogFormatter.info_fmt, None),
+            logging.WARNING: (LogFormatter.wrn_fmt, LogFormatter.wrn_file_fmt),
+            logging.ERROR: (LogFormatter.err_fmt, LogFormatter.err_file_fmt),
+        }
+        self._plain_formats = {
+            logging.WARNING: (LogFormatter.wrn_plain_fmt, LogFormatter.wrn_file_plain_fmt),
+            logging.ERROR: (LogFormatter.err_plain_fmt, LogFormatter.err_file_plain_fmt),
+        }
+        self._annotations = dict.fromkeys(self._plain_formats, 0)
 
     def format(self, record):
-
-        # Save the original format configured by the user
-        # when the logger formatter was instantiated
-        format_orig = self._style._fmt
-
-        # Replace the original format with one customized by logging level
-        if record.levelno == logging.DEBUG:
-            self._style._fmt = LogFormatter.dbg_fmt
-
-        elif record.levelno == logging.INFO:
-            self._style._fmt = LogFormatter.info_fmt
-
-        elif record.levelno == logging.WARNING:
-            if getattr(record, 'file', None):
-                self._style._fmt = LogFormatter.wrn_file_fmt
-                _ensure_line_col(record)
-            else:
-                self._style._fmt = LogFormatter.wrn_fmt
-
-        elif record.levelno == logging.ERROR:
-            if getattr(record, 'file', None):
-                self._style._fmt = LogFormatter.err_file_fmt
-                _ensure_line_col(record)
-            else:
-                self._style._fmt = LogFormatter.err_fmt
-
-        # Call the original formatter class to do the grunt work
-        result = logging.Formatter.format(self, record)
-
-        # If the log statements contains legacy formatted strings with %s / %d ...
-        # logging.Formatter.format() apparently tries to handle it, but doesn't somehow.
-        # Only encountered with requests.
-        # Update 2020-05-21, Python 3.8.2, requests 2.23.0:
-        # For some reason, this has changed now, and requests.exceptions are handled fine.
-        # Instead, this line itself throws the following exception, even for exceptions of other packages:
-        #     TypeError: not enough arguments for format string
-        # Since I think there's the possibility that other error messages would still need the following extra step,
-        # I'm going to keep the line for now, but put it behind an if-clause, which seems to work.
-        if record.args:
-            result = result % record.args
-
-        # Restore the original format configured by the user
-        self._style._fmt = format_orig
-
-        return result
+        # Handlers only format one record at a time, no lock needed for counting the annotations.
+        formats = self._formats.get(record.levelno, (LogFormatter.other_fmt, None))
+        prefix = ''
+        if record.levelno in self._annotations and self.max_annotations:
+            if self._annotations[record.levelno] >= self.max_annotations:
+                if self._annotations[record.levelno] == self.max_annotations:
+                    prefix = (f'Only the first {self.max_annotations} {logging.getLevelName(record.levelno).lower()}s '
+                              f'are annotations, the following ones are not\n')
+                formats = self._plain_formats[record.levelno]
+            self._annotations[record.levelno] += 1
+
+        values = {'msg': record.getMessage(), 'levelno': record.levelno}
+        if formats[1] is not None and getattr(record, 'file', None):
+            _ensure_line_col(record)
+            values.update(file=record.file, line=record.line, col=record.col)
+            result = formats[1] % values
+        else:
+            result = formats[0] % values
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            result += '\n' + record.exc_text
+        if record.stack_info:
+            result += '\n' + self.formatStack(record.stack_info)
+        return prefix + result
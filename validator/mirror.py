@@ -0,0 +1,161 @@
+import argparse
+import hashlib
+import io
+import logging as log
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+from typing import Iterable, List
+from urllib.parse import quote, urlparse
+
+import requests
+from requests.adapters import BaseAdapter
+
+from . import http
+from .utils import write_text_atomic
+
+# Not outbound, requests to these hosts are sent as they are.
+LOOPBACK_HOSTS = frozenset({'localhost', '127.0.0.1', '::1'})
+
+
+def mirror_path(url: str) -> PurePosixPath:
+    """Where a mirror keeps the file at the given URL: <host>/<path>, like github.com/user/repo/raw/master/x.version.
+
+    A port is appended to the host with an underscore, a query to the file name with a hash of it.
+    """
+    parts = urlparse(url)
+    host = parts.netloc.rsplit('@', 1)[-1].replace(':', '_').lower()
+    segments = [segment for segment in parts.path.split('/') if segment not in ('', '.', '..')]
+    if not segments or parts.path.endswith('/'):
+        segments.append('index')
+    path = PurePosixPath(host, *segments)
+    if parts.query:
+        path = path.with_name(f'{path.name}@{hashlib.sha256(parts.query.encode()).hexdigest()[:16]}')
+    return path
+
+
+class MirrorAdapter(BaseAdapter):
+    """Answers all requests from a mirror instead of the internet, so runs don't need network access.
+
+    The mirror is either a local directory or the URL of a server that serves such a directory, like a local
+    stand-in in an air-gapped network. See mirror_path() for its layout and prefetch() to fill it.
+    Files that aren't in a mirror directory are answered with 404 Not Found. Their ETag is the hash of their content,
+    so conditional requests work like with GitHub. Requests to loopback hosts are sent as they are.
+    """
+
+    def __init__(self, mirror: str, http_adapter: BaseAdapter):
+        """
+        :param mirror: The path of the mirror directory, or the http(s) URL of the stand-in server.
+        :param http_adapter: Sends the requests to loopback hosts and the stand-in server.
+        """
+        super().__init__()
+        self.mirror = mirror
+        self.is_server = urlparse(mirror).scheme in ('http', 'https')
+        self.http_adapter = http_adapter
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if urlparse(request.url).hostname in LOOPBACK_HOSTS:
+            return self.http_adapter.send(request, **kwargs)
+        path = mirror_path(request.url)
+        if self.is_server:
+            mirrored = request.copy()
+            mirrored.url = f'{self.mirror.rstrip("/")}/{quote(str(path))}'
+            log.debug('Requesting %s from the mirror at %s', request.url, mirrored.url)
+            return self.http_adapter.send(mirrored, **kwargs)
+        return self._file_response(request, Path(self.mirror, path))
+
+    @staticmethod
+    def _file_response(request: requests.PreparedRequest, path: Path) -> requests.Response:
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.encoding = 'utf-8'
+        try:
+            content = path.read_bytes()
+        except OSError:
+            log.debug('%s is not in the mirror (%s)', request.url, path)
+            (response.status_code, response.reason, content) = (404, 'Not in mirror', b'')
+        else:
+            response.headers['ETag'] = etag = f'"{hashlib.sha256(content).hexdigest()}"'
+            if request.headers.get('If-None-Match') == etag:
+                (response.status_code, response.reason, content) = (304, 'Not Modified', b'')
+            else:
+                (response.status_code, response.reason) = (200, 'OK')
+        response.raw = io.BytesIO(content)
+        return response
+
+    def close(self):
+        self.http_adapter.close()
+
+
+def prefetch(directory: Path, urls: Iterable[str], max_workers=4) -> List[str]:
+    """Downloads the given URLs into a mirror directory, replacing the files that are there already.
+
+    :param directory: The mirror directory, created if it doesn't exist.
+    :param max_workers: The maximum number of files to download in parallel.
+    :return: The URLs that couldn't be downloaded.
+    """
+    def fetch(url: str) -> bool:
+        try:
+            response = http.get(url)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            log.warning(f'Failed downloading {url}: {e}')
+            return False
+        path = directory.joinpath(mirror_path(url))
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_text_atomic(path, response.text)
+        except OSError as e:
+            # Like a URL that is the parent directory of another one.
+            log.warning(f'Failed storing {url} in the mirror: {e}')
+            return False
+        log.info('Mirrored %s', url)
+        return True
+
+    urls = list(dict.fromkeys(urls))
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        return [url for (url, fetched) in zip(urls, executor.map(fetch, urls)) if not fetched]
+
+
+def urls_to_prefetch(paths: List[Path]) -> List[str]:
+    """The URLs a run needs: the schema, the build map, and the remotes of the version files below the paths."""
+    from .validator import BUILD_MAP_URL, SCHEMA_URL, find_version_files
+    from .versionfile import VersionFile, get_raw_uri
+
+    urls = [SCHEMA_URL, BUILD_MAP_URL]
+    for path in paths:
+        for f in (sorted(find_version_files(path)) if path.is_dir() else [path]):
+            try:
+                version_file = VersionFile(f.read_text(encoding='utf-8'), f)
+            except (OSError, ValueError) as e:
+                log.warning(f'Skipping {f}: {e}')
+                continue
+            if isinstance(version_file.url, str):
+                urls.append(get_raw_uri(version_file.url))
+    return urls
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m validator.mirror',
+                                     description='Manages a mirror of the files the validator downloads.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    prefetch_parser = commands.add_parser(
+        'prefetch', help='download the schema, the build map and the remote version files into a mirror directory')
+    prefetch_parser.add_argument('mirror', type=Path, help='the mirror directory')
+    prefetch_parser.add_argument('paths', nargs='*', type=Path, default=[Path()],
+                                 help='version files, or directories to search for version files (default: .)')
+    prefetch_parser.add_argument('--url', action='append', default=[], help='download this URL as well')
+    prefetch_parser.add_argument('--concurrency', type=int, default=4, help='number of parallel downloads')
+    args = parser.parse_args()
+
+    log.basicConfig(level=log.INFO, format='%(message)s')
+    urls = urls_to_prefetch(args.paths) + args.url
+    failed = prefetch(args.mirror, urls, args.concurrency)
+    print(f'Mirrored {len(set(urls)) - len(failed)} files into {args.mirror}, {len(failed)} failed.')
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+import json
+import re
+from json.decoder import scanstring
+from json.scanner import NUMBER_RE
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+Position = Tuple[int, int]
+
+# The whitespace around the structural characters is matched together with them.
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_EMPTY_OBJECT = re.compile(r'[ \t\n\r]*}')
+_EMPTY_ARRAY = re.compile(r'[ \t\n\r]*]')
+_KEY_START = re.compile(r'[ \t\n\r]*"')
+_COLON = re.compile(r'[ \t\n\r]*:[ \t\n\r]*')
+_OBJECT_SEPARATOR = re.compile(r'[ \t\n\r]*([,}])[ \t\n\r]*')
+_ARRAY_SEPARATOR = re.compile(r'[ \t\n\r]*([,\]])[ \t\n\r]*')
+_CONSTANTS = (('null', None), ('true', True), ('false', False),
+              ('NaN', float('nan')), ('Infinity', float('inf')), ('-Infinity', float('-inf')))
+
+
+def loads(content: str) -> Tuple[Any, Dict[str, Position]]:
+    """Parses JSON like json.loads(), and finds the line and column of every value while doing so.
+
+    :return: The parsed JSON, and the (line, col) of every value by its JSON pointer, like '/KSP_VERSION/MAJOR'.
+             Both start at 1, like the ones of json.JSONDecodeError.
+    :raises json.decoder.JSONDecodeError: If the content isn't valid JSON, the same one json.loads() would raise.
+    """
+    parser = _Parser(content)
+    try:
+        (value, end) = parser.value(parser.skip(0), '')
+        if parser.skip(end) != len(content):
+            raise ValueError('Extra data')
+    except (ValueError, IndexError, RecursionError):
+        # Let the json module complain, with its usual message and position. It's only in the same
+        # state as this parser if it accepts something this one doesn't, no positions then.
+        return json.loads(content), {}
+    return value, _to_positions(content, parser.offsets)
+
+
+def pointer(path: Iterable) -> str:
+    """The JSON pointer of a path of keys and indices, like the absolute_path of a jsonschema.ValidationError."""
+    return ''.join('/' + str(part).replace('~', '~0').replace('/', '~1') for part in path)
+
+
+def find(positions: Dict[str, Position], path: Iterable) -> Optional[Position]:
+    """Returns the position of the value at the given path, or of its closest parent that has one."""
+    best = positions.get('')
+    current = ''
+    for part in path:
+        current += pointer((part,))
+        if (position := positions.get(current)) is None:
+            break
+        best = position
+    return best
+
+
+class _Parser:
+    # Recursive descent with the scanners of the json module, recording the offset of every value in document order.
+
+    def __init__(self, content: str):
+        self.content = content
+        self.offsets: List[Tuple[str, int]] = []
+
+    def skip(self, idx: int) -> int:
+        return _WHITESPACE.match(self.content, idx).end()
+
+    def value(self, idx: int, at: str) -> Tuple[Any, int]:
+        s = self.content
+        self.offsets.append((at, idx))
+        c = s[idx]
+        if c == '"':
+            return scanstring(s, idx + 1, True)
+        if c == '{':
+            return self.object(idx + 1, at)
+        if c == '[':
+            return self.array(idx + 1, at)
+        if (match := NUMBER_RE.match(s, idx)) is not None:
+            (integer, frac, exp) = match.groups()
+            if frac or exp:
+                return float(integer + (frac or '') + (exp or '')), match.end()
+            return int(integer), match.end()
+        for (name, constant) in _CONSTANTS:
+            if s.startswith(name, idx):
+                return constant, idx + len(name)
+        raise ValueError(f'Expecting value at {idx}')
+
+    def object(self, idx: int, at: str) -> Tuple[dict, int]:
+        s = self.content
+        obj = {}
+        if (match := _EMPTY_OBJECT.match(s, idx)) is not None:
+            return obj, match.end()
+        while True:
+            if (match := _KEY_START.match(s, idx)) is None:
+                raise ValueError(f'Expecting property name at {idx}')
+            (key, idx) = scanstring(s, match.end(), True)
+            if (match := _COLON.match(s, idx)) is None:
+                raise ValueError(f'Expecting \':\' at {idx}')
+            escaped = key.replace('~', '~0').replace('/', '~1') if '~' in key or '/' in key else key
+            (obj[key], idx) = self.value(match.end(), f'{at}/{escaped}')
+            if (match := _OBJECT_SEPARATOR.match(s, idx)) is None:
+                raise ValueError(f'Expecting \',\' at {idx}')
+            idx = match.end()
+            if match.group(1) == '}':
+                return obj, idx
+
+    def array(self, idx: int, at: str) -> Tuple[list, int]:
+        s = self.content
+        array = []
+        if (match := _EMPTY_ARRAY.match(s, idx)) is not None:
+            return array, match.end()
+        idx = self.skip(idx)
+        while True:
+            (value, idx) = self.value(idx, f'{at}/{len(array)}')
+            array.append(value)
+            if (match := _ARRAY_SEPARATOR.match(s, idx)) is None:
+                raise ValueError(f'Expecting \',\' at {idx}')
+            idx = match.end()
+            if match.group(1) == ']':
+                return array, idx
+
+
+def _to_positions(content: str, offsets: List[Tuple[str, int]]) -> Dict[str, Position]:
+    # Counts the lines between the offsets in order, so the content is only gone through once.
+    # Later duplicate keys win, like in the parsed JSON.
+    positions = {}
+    (line, line_start, previous) = (1, 0, 0)
+    for (at, offset) in offsets:
+        if newlines := content.count('\n', previous, offset):
+            line += newlines
+            line_start = content.rfind('\n', previous, offset) + 1
+        positions[at] = (line, offset - line_start + 1)
+        previous = offset
+    return positions
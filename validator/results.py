@@ -0,0 +1,149 @@
+import json
+import logging as log
+import threading
+from pathlib import Path
+from typing import Optional
+
+RESULT_FORMATS = ('jsonl', 'sarif')
+
+# Outcomes of the remote version file check, see check_single_file().
+REMOTE_VALID = 'valid'
+REMOTE_NONE = 'none'
+REMOTE_DOWNLOAD_FAILED = 'download_failed'
+REMOTE_INVALID_JSON = 'invalid_json'
+REMOTE_INVALID = 'invalid'
+
+SARIF_SCHEMA = 'https://json.schemastore.org/sarif-2.1.0.json'
+INFORMATION_URI = 'https://github.com/DasSkelett/AVC-VersionFileValidator'
+
+
+class Results(log.Handler):
+    """Collects the warnings and errors of a run per version file, to write them out in a machine-readable format.
+
+    Added to the root logger, it picks up every warning and error logged with a file (see LogExtra),
+    the remaining ones are kept as messages of the whole run.
+    """
+
+    def __init__(self):
+        super().__init__(log.WARNING)
+        self.messages = {}
+        self.run_messages = []
+        self.remotes = {}
+        self._lock = threading.Lock()
+
+    def emit(self, record):
+        f = getattr(record, 'file', None)
+        message = {'level': _level_name(record.levelno), 'message': record.getMessage()}
+        with self._lock:
+            if f is None:
+                self.run_messages.append(message)
+            else:
+                message['line'] = getattr(record, 'line', None) or 1
+                message['col'] = getattr(record, 'col', None) or 1
+                self.messages.setdefault(str(Path(f)), []).append(message)
+
+    def set_remote_status(self, f: Path, status: str):
+        with self._lock:
+            self.remotes[str(Path(f))] = status
+
+    def get_remote_status(self, f: Path) -> Optional[str]:
+        with self._lock:
+            return self.remotes.get(str(Path(f)))
+
+    def file_results(self, successful, failed, ignored) -> list:
+        """Combines the collected messages with the outcome of the run into one dict per file, sorted by path."""
+        status = {str(Path(f)): 'ignored' for f in ignored}
+        status.update({str(Path(f)): 'failed' for f in failed})
+        status.update({str(Path(f)): 'successful' for f in successful})
+        with self._lock:
+            return [{
+                'file': f,
+                'status': status[f],
+                'remote': self.remotes.get(f),
+                'messages': list(self.messages.get(f, []))
+            } for f in sorted(status)]
+
+    def to_jsonl(self, status: int, successful, failed, ignored) -> str:
+        lines = [{'type': 'file', **result} for result in self.file_results(successful, failed, ignored)]
+        with self._lock:
+            lines.append({'type': 'run', 'status': status, 'successful': len(successful), 'failed': len(failed),
+                          'ignored': len(ignored), 'messages': list(self.run_messages)})
+        return ''.join(json.dumps(line) + '\n' for line in lines)
+
+    def to_sarif(self, status: int, successful, failed, ignored) -> str:
+        sarif_results = []
+        for result in self.file_results(successful, failed, ignored):
+            for message in result['messages']:
+                sarif_results.append({
+                    'ruleId': 'invalid-version-file' if message['level'] == 'error' else 'version-file-warning',
+                    'level': message['level'],
+                    'message': {'text': message['message']},
+                    'locations': [{'physicalLocation': {
+                        'artifactLocation': {'uri': Path(result['file']).as_posix()},
+                        'region': {'startLine': message['line'], 'startColumn': message['col']}
+                    }}]
+                })
+        with self._lock:
+            notifications = [{'level': m['level'], 'message': {'text': m['message']}} for m in self.run_messages]
+        return json.dumps({
+            '$schema': SARIF_SCHEMA,
+            'version': '2.1.0',
+            'runs': [{
+                'tool': {'driver': {
+                    'name': 'AVC-VersionFileValidator',
+                    'informationUri': INFORMATION_URI,
+                    'rules': [
+                        {'id': 'invalid-version-file',
+                         'shortDescription': {'text': 'The version file is invalid'}},
+                        {'id': 'version-file-warning',
+                         'shortDescription': {'text': 'The version file or its remote might have a problem'}}
+                    ]
+                }},
+                'invocations': [{'executionSuccessful': status == 0 or bool(failed),
+                                 'toolExecutionNotifications': notifications}],
+                'results': sarif_results
+            }]
+        }, indent=2)
+
+
+_results: Optional[Results] = None
+
+
+def setup_results(enabled=True):
+    """Starts or stops collecting results. Disabled by default, set_remote_status() doesn't do anything then."""
+    global _results
+    root_logger = log.getLogger()
+    if _results is not None:
+        root_logger.removeHandler(_results)
+    _results = Results() if enabled else None
+    if _results is not None:
+        root_logger.addHandler(_results)
+
+
+def get_results() -> Optional[Results]:
+    return _results
+
+
+def set_remote_status(f: Path, status: str):
+    if _results is not None:
+        _results.set_remote_status(f, status)
+
+
+def write_results(path: Path, result_format: str, status: int, successful, failed, ignored):
+    """Writes the collected results to path, as JSON Lines with one object per file and a last one for the run,
+    or as SARIF 2.1.0.
+    """
+    if _results is None:
+        return
+    if result_format == 'sarif':
+        text = _results.to_sarif(status, successful, failed, ignored)
+    elif result_format == 'jsonl':
+        text = _results.to_jsonl(status, successful, failed, ignored)
+    else:
+        raise ValueError(f'Unknown result format {result_format}, use one of {RESULT_FORMATS}')
+    path.write_text(text, encoding='utf-8')
+    log.debug(f'Results written to {path}')
+
+
+def _level_name(levelno: int) -> str:
+    return 'error' if levelno >= log.ERROR else 'warning'
@@ -0,0 +1,132 @@
+import json
+import logging as log
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_SLOWEST = 10
+
+
+class Timings:
+    """Records how long the phases of a run and the checks of every file took, and all downloads.
+
+    Phases entered more than once add up, and may be nested: 'build_map' is usually part of 'validation'.
+    Thread-safe, downloads are recorded from the worker threads.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.files = {}
+        self.downloads = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(self.phases, name, time.perf_counter() - start)
+
+    @contextmanager
+    def file(self, f: Path):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(self.files, str(f), time.perf_counter() - start)
+
+    def add_download(self, url: str, size: int, seconds: float, status: Optional[int]):
+        with self._lock:
+            self.downloads.append({'url': url, 'bytes': size, 'seconds': seconds, 'status': status})
+
+    def merge(self, phases: dict, files: dict, downloads: list):
+        """Adds the phases, files and downloads recorded by another instance, like one in a worker process."""
+        with self._lock:
+            for (name, seconds) in phases.items():
+                self.phases[name] = self.phases.get(name, 0.0) + seconds
+            for (f, seconds) in files.items():
+                self.files[f] = self.files.get(f, 0.0) + seconds
+            self.downloads.extend(downloads)
+
+    def _add(self, target: dict, key: str, seconds: float):
+        with self._lock:
+            target[key] = target.get(key, 0.0) + seconds
+
+    def to_dict(self, slowest=DEFAULT_SLOWEST) -> dict:
+        with self._lock:
+            return {
+                'phases': dict(self.phases),
+                'files': len(self.files),
+                'downloads': len(self.downloads),
+                'bytes_downloaded': sum(d['bytes'] for d in self.downloads),
+                'slowest_files': [{'file': f, 'seconds': s} for (f, s) in
+                                  sorted(self.files.items(), key=lambda i: i[1], reverse=True)[:slowest]],
+                'slowest_downloads': sorted(self.downloads, key=lambda d: d['seconds'], reverse=True)[:slowest]
+            }
+
+    def to_markdown(self, slowest=DEFAULT_SLOWEST) -> str:
+        report = self.to_dict(slowest)
+        lines = ['### KSP-AVC Version File Validator timings', '',
+                 f'{report["files"]} files checked, {report["downloads"]} downloads '
+                 f'({report["bytes_downloaded"] / 1024:.1f} KiB)', '',
+                 '| Phase | Seconds |', '| --- | ---: |']
+        lines += [f'| {name} | {seconds:.3f} |' for (name, seconds) in report['phases'].items()]
+        if report['slowest_files']:
+            lines += ['', '| Slowest files | Seconds |', '| --- | ---: |']
+            lines += [f'| `{f["file"]}` | {f["seconds"]:.3f} |' for f in report['slowest_files']]
+        if report['slowest_downloads']:
+            lines += ['', '| Slowest downloads | Status | KiB | Seconds |', '| --- | ---: | ---: | ---: |']
+            lines += [f'| {d["url"]} | {d["status"]} | {d["bytes"] / 1024:.1f} | {d["seconds"]:.3f} |'
+                      for d in report['slowest_downloads']]
+        return '\n'.join(lines) + '\n'
+
+
+_timings: Optional[Timings] = None
+
+
+def setup_timing(enabled=True):
+    """Enables or disables recording timings. Disabled by default, the hooks below don't do anything then."""
+    global _timings
+    _timings = Timings() if enabled else None
+
+
+def get_timings() -> Optional[Timings]:
+    return _timings
+
+
+@contextmanager
+def phase(name: str):
+    if _timings is None:
+        yield
+    else:
+        with _timings.phase(name):
+            yield
+
+
+@contextmanager
+def file(f: Path):
+    if _timings is None:
+        yield
+    else:
+        with _timings.file(f):
+            yield
+
+
+def add_download(url: str, size: int, seconds: float, status: Optional[int]):
+    if _timings is not None:
+        _timings.add_download(url, size, seconds, status)
+
+
+def write_reports(report_path: Optional[Path], summary_path: Optional[Path], slowest=DEFAULT_SLOWEST):
+    """Writes the recorded timings as JSON to report_path, and appends a Markdown summary to summary_path."""
+    if _timings is None:
+        return
+    if report_path:
+        report_path.write_text(json.dumps(_timings.to_dict(slowest), indent=2), encoding='utf-8')
+        log.debug(f'Timing report written to {report_path}')
+    if summary_path:
+        with summary_path.open('a', encoding='utf-8') as summary:
+            summary.write(_timings.to_markdown(slowest))
@@ -1,5 +1,8 @@
+import hashlib
 import json
 import os
+import threading
+from pathlib import Path
 from typing import List
 
 
@@ -21,6 +24,19 @@ def parse_json_array(json_string: str) -> List:
         # Not a valid JSON array, assume it is a single file
         return [json_string]
 
+
+def write_text_atomic(path: Path, text: str):
+    # Write to a temporary file first, so that readers never see a half-written file.
+    tmp_path = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    tmp_path.write_text(text, encoding='utf-8')
+    os.replace(tmp_path, path)
+
+
+def hash_json(value) -> str:
+    # Equal for equal values, no matter the order of their keys.
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode()).hexdigest()
+
+
 def str_to_bool(value: str) -> bool:
     if value.lower() in ('y', 'yes', 't','true', 'on', '1'):
         return True
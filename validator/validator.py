@@ -1,49 +1,96 @@
+import functools
 import json
 import logging as log
+import math
+import os
+import subprocess
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Set
-
-import jsonschema
-import requests
+from typing import Callable, Iterator, List, Optional, Set, Tuple
 
+from .cache import fetch_text, get_remote_results
+from . import cache, http, results, timing
+from .exclusions import ExclusionMatcher
+from .incremental import Manifest, hash_file, replay
 from .ksp_version import KspVersion
 from .logger import LogExtra
-from .utils import parse_json_array
-from .versionfile import VersionFile
+from .versionfile import RemoteCache, VersionFile, compile_schema, get_repository_location
+
+# Number of remote version files that are downloaded in parallel.
+DEFAULT_MAX_WORKERS = 4
+
+# Number of chunks the files are split into for each process, see _check_in_processes().
+CHUNKS_PER_PROCESS = 4
+
+SCHEMA_URL = 'https://github.com/linuxgurugamer/KSPAddonVersionChecker/raw/master/KSP-AVC.schema.json'
+BUILD_MAP_URL = 'https://github.com/KSP-CKAN/CKAN-meta/raw/master/builds.json'
+
+# Directories that are never searched for version files.
+VCS_DIRS = frozenset({'.git', '.hg', '.svn', '.bzr'})
 
 
-def validate_cwd(exclude, schema=None, build_map=None):
+def validate_cwd(exclude, schema=None, build_map=None, max_workers=DEFAULT_MAX_WORKERS, use_git=False,
+                 manifest_path: Path = None, latest_ksp: KspVersion = None, processes=1, all_errors=False):
     """Validates recursively the version files found in the current working directory.
 
     :param exclude: A string formatted as JSON array containing files or directories to exclude. Supports wildcards.
     :param schema: A **valid** Python object representing the schema. Use sparingly, intended for tests!
     :param build_map: A **valid** Python object representing the build map. Use sparingly, intended for tests!
+    :param max_workers: The maximum number of remote version files to download in parallel.
+    :param manifest_path: Where to store the results for incremental validation. Unchanged files are skipped.
+    :param use_git: Ask 'git ls-files' for the version files instead of walking the directory tree.
+    :param latest_ksp: Check compatibility with this KSP version instead of the latest one from the build map.
+    :param processes: Parse and validate the files in this many processes, for very large numbers of files.
+    :param all_errors: Report all schema errors of each file instead of only the most relevant one.
     :return: A 4-tuple containing the validation status, valid files, failed files and ignored files.
+             Directories that are excluded as a whole are not searched, they are among the ignored files themselves.
     :rtype: (int, Set[Path], Set[Path], Set[Path])
     """
-    all_exclusions = _calculate_all_exclusions(exclude)
+    matcher = ExclusionMatcher.from_json(exclude)
 
     # GH will set the cwd of the container to the so-called workspace, which is a clone of the triggering repo,
     # assuming the user remembered to add the 'actions/checkout' step before.
-    found_files = {f for f in Path().rglob('*')
-                   if f.is_file() and f.suffix.lower() == '.version'}
-
-    version_files = found_files.difference(all_exclusions)
-    ignored_files = found_files.intersection(all_exclusions)
+    with timing.phase('discovery'):
+        found_files = None
+        excluded_dirs = []
+        if use_git:
+            found_files = git_ls_version_files()
+        if found_files is None:
+            def skip_dir(directory):
+                if matcher.excludes_subtree(directory):
+                    excluded_dirs.append(directory)
+                    return True
+                return False
+            found_files = find_version_files(skip_dir=skip_dir)
+
+        version_files = set()
+        ignored_files = set()
+        for f in found_files:
+            (ignored_files if matcher.matches(f) else version_files).add(f)
+        # Fully excluded directories are ignored as a whole, they aren't searched at all.
+        ignored_files.update(excluded_dirs)
 
     if ignored_files:
-        log.info(f'Ignoring {[str(f) for f in ignored_files]}')
+        log.info(f'Ignoring {[str(f) for f in sorted(ignored_files)]}')
 
-    (code, successful_files, failed_files) = _check_file_set(version_files, schema, build_map)
+    (code, successful_files, failed_files) = _check_file_set(version_files, schema, build_map, max_workers,
+                                                             manifest_path, latest_ksp, processes, all_errors)
     return code, successful_files, failed_files, ignored_files
 
 
-def validate_list(file_list, schema=None, build_map=None):
+def validate_list(file_list, schema=None, build_map=None, max_workers=DEFAULT_MAX_WORKERS,
+                  manifest_path: Path = None, latest_ksp: KspVersion = None, processes=1, all_errors=False):
     """Validates all the given files in the list.
 
     :param file_list: A list of strings that are relative or absolute paths to the files that should be validated.
     :param schema: A **valid** Python object representing the schema. Use sparingly, intended for tests!
     :param build_map: A **valid** Python object representing the build map. Use sparingly, intended for tests!
+    :param max_workers: The maximum number of remote version files to download in parallel.
+    :param manifest_path: Where to store the results for incremental validation. Unchanged files are skipped.
+    :param latest_ksp: Check compatibility with this KSP version instead of the latest one from the build map.
+    :param processes: Parse and validate the files in this many processes, for very large numbers of files.
+    :param all_errors: Report all schema errors of each file instead of only the most relevant one.
     :return: A 4-tuple containing the validation status, valid files, failed files and ignored files.
     :rtype: (int, Set[Path], Set[Path], Set[Path])
     """
@@ -59,16 +106,29 @@ def validate_list(file_list, schema=None, build_map=None):
     if nonexistent_files:
         log.info(f'Files {[str(f) for f in nonexistent_files]} don\'t exist')
 
-    (code, successful_files, failed_files) = _check_file_set(version_files, schema, build_map)
+    (code, successful_files, failed_files) = _check_file_set(version_files, schema, build_map, max_workers,
+                                                             manifest_path, latest_ksp, processes, all_errors)
     return code, successful_files, failed_files, nonexistent_files
 
 
-def _check_file_set(version_files, schema=None, build_map=None):
+def _check_file_set(version_files, schema=None, build_map=None, max_workers=DEFAULT_MAX_WORKERS,
+                    manifest_path: Path = None, latest_ksp: KspVersion = None, processes=1, all_errors=False):
     """Validates the given set of files. For internal use only.
 
+    Remote version files are downloaded in a thread pool while the local files are validated.
+    All logging happens on the calling thread, in the sorted order of the files.
+    With more than one process, the files are checked in chunks in a process pool, and the log records of the
+    workers are emitted again on the calling thread, still in the sorted order.
+
     :param version_files: A set of Path-es to validate.
-    :param schema: A **valid** Python object representing the schema. Use sparingly, intended for tests!
+    :param schema: A **valid** Python object representing the schema, or the result of compile_schema().
     :param build_map: A **valid** Python object representing the build map. Use sparingly, intended for tests!
+    :param max_workers: The maximum number of remote version files to download in parallel.
+    :param manifest_path: Where to store the results for incremental validation. Unchanged files are skipped.
+    :param latest_ksp: Check compatibility with this KSP version instead of the latest one from the build map.
+                       A LatestKspVersion is used as it is, so it can be shared between several runs.
+    :param processes: Parse and validate the files in this many processes, for very large numbers of files.
+    :param all_errors: Report all schema errors of each file instead of only the most relevant one.
     :return: A 4-tuple containing the validation status, valid files and failed files.
     :rtype: (int, Set[Path], Set[Path])
     """
@@ -79,28 +139,74 @@ def _check_file_set(version_files, schema=None, build_map=None):
         log.warning('No version files found.')
         return 0, successful_files, failed_files
 
-    log.info(f'Found {[str(f) for f in version_files]}')
-
-    if schema is None:
-        schema = get_schema()
-    if schema is None:
-        return 1, successful_files, failed_files
-    if build_map is None:
-        build_map = get_build_map()
-
-    latest_ksp = None
-    if build_map is not None:
-        builds = build_map.get('builds', None)
-        if builds is not None:
-            latest_ksp = KspVersion(list(builds.values())[-1])
-
-    for f in version_files:
-        # The actual validation happens here.
-        valid = check_single_file(f, schema, latest_ksp)
-        if valid:
-            successful_files.add(f)
+    sorted_files = sorted(version_files)
+    log.info(f'Found {[str(f) for f in sorted_files]}')
+
+    with timing.phase('schema'):
+        if schema is None:
+            schema = get_schema()
+        if schema is None:
+            return 1, successful_files, failed_files
+        # Not imported before, so that runs without any version files don't have to wait for it.
+        import jsonschema
+        try:
+            schema_validator = compile_schema(schema)
+        except jsonschema.SchemaError as e:
+            log.error(f'The current schema is invalid itself, that\'s unfortunate... {e}')
+            return 1, successful_files, failed_files
+    # Only downloads the build map once a file needs it.
+    if not isinstance(latest_ksp, LatestKspVersion):
+        latest_ksp = LatestKspVersion(latest_ksp, build_map)
+
+    manifest = None
+    content_hashes = {}
+    unchanged = {}
+    if manifest_path is not None:
+        with timing.phase('manifest'):
+            manifest = Manifest(manifest_path, schema_validator.schema, latest_ksp.get(), all_errors)
+            for f in sorted_files:
+                content_hashes[f] = hash_file(f)
+                if entry := manifest.lookup(f, content_hashes[f]):
+                    unchanged[f] = entry
+
+    with timing.phase('validation'), ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        to_check = [f for f in sorted_files if f not in unchanged]
+        checked = None
+        remotes = {}
+        if processes > 1 and to_check:
+            # Parsing and validating happens in other processes, only their logging is repeated here, in order.
+            checked = _check_in_processes(to_check, schema_validator.schema, latest_ksp, processes, max_workers,
+                                          all_errors)
         else:
-            failed_files.add(f)
+            # Start downloading all remotes right away, they are awaited one by one in check_single_file().
+            remote_cache = RemoteCache(compact=True, results=get_remote_results(), schema_validator=schema_validator)
+            remotes = {f: executor.submit(_prefetch, f, schema_validator, remote_cache) for f in to_check}
+        for f in sorted_files:
+            with timing.file(f):
+                if f in unchanged:
+                    valid = replay(f, unchanged[f])
+                else:
+                    if checked is not None:
+                        check = functools.partial(_emit_checked, *next(checked))
+                    else:
+                        check = functools.partial(check_single_file, f, schema_validator, latest_ksp, remotes[f],
+                                                  all_errors)
+                    if manifest is not None and content_hashes[f] is not None:
+                        valid = manifest.check(f, content_hashes[f], check)
+                    else:
+                        # The actual validation happens here.
+                        valid = check()
+            if valid:
+                successful_files.add(f)
+            else:
+                failed_files.add(f)
+
+    if manifest is not None:
+        with timing.phase('manifest'):
+            manifest.save()
+    if to_check and (remote_results := get_remote_results()) is not None:
+        with timing.phase('remote_cache'):
+            remote_results.save()
 
     log.debug('Done!')
     if failed_files:
@@ -110,31 +216,137 @@ def _check_file_set(version_files, schema=None, build_map=None):
         return 0, successful_files, failed_files
 
 
-def _calculate_all_exclusions(exclude: str) -> Set[Path]:
-    all_exclusions = set()
-    if exclude and not exclude.isspace():
-        globs = parse_json_array(exclude)
+def find_version_files(root: Path = Path(), skip_dir: Callable[[Path], bool] = None) -> Iterator[Path]:
+    """Recursively yields all files below root that have a .version suffix (case-insensitive).
+
+    Names are checked before anything else, so only version files need a stat() call.
+    Directories are entered even if their name looks like a version file's.
+    VCS metadata directories and symlinked directories are not entered.
+
+    :param root: The directory to start at. The yielded paths start with it.
+    :param skip_dir: Optional callable, directories for which it returns True are not entered.
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    path = directory / entry.name
+                    if _is_version_file_name(entry.name) and entry.is_file():
+                        yield path
+                    elif entry.is_dir(follow_symlinks=False) and entry.name not in VCS_DIRS:
+                        if skip_dir is None or not skip_dir(path):
+                            stack.append(path)
+        except OSError as e:
+            log.debug(f'Skipping {directory}: {e}')
+
+
+def git_ls_version_files() -> Optional[Set[Path]]:
+    """Asks git for all tracked and untracked, but not ignored version files in the current working directory.
+
+    :return: The version files, or None if git is not available or this isn't a git checkout.
+    """
+    # The pathspec leaves most other files out of the output already, only a file called '.version' gets through.
+    output = _run_git('ls-files', '-z', '--cached', '--others', '--exclude-standard', '--', ':(icase)*.version')
+    if output is None:
+        return None
+    # Files deleted in the working tree are still listed with --cached.
+    return {p for name in output.split('\0')
+            if _is_version_file_name(os.path.basename(name))
+            and VCS_DIRS.isdisjoint((p := Path(name)).parts) and p.is_file()}
+
+
+def git_changed_version_files(base_ref: str, matcher: ExclusionMatcher = None) -> Optional[Set[Path]]:
+    """Asks git for the version files in the current working directory that were added or modified since base_ref.
+
+    Version files whose URL points to a file of this repository that changed since base_ref are included as well.
+    To find those, all version files git knows about are read once, unless nothing changed at all.
+    The changes are counted from the merge base of base_ref and HEAD, so changes on base_ref itself are ignored.
+
+    :param base_ref: A git revision, like a branch name or commit hash. Its history must be available.
+    :param matcher: Excluded version files aren't read to look at their URL. They may still be among the changed ones.
+    :return: The version files, or None if git is not available or base_ref is unknown.
+    """
+    merge_base = _run_git('merge-base', base_ref, 'HEAD')
+    prefix = _run_git('rev-parse', '--show-prefix')
+    if merge_base is None or prefix is None:
+        return None
+    output = _run_git('diff', '--name-only', '-z', '--diff-filter=ACMR', merge_base.strip())
+    if output is None:
+        return None
+    # Relative to the repository root, not the current working directory.
+    changed_paths = {name for name in output.split('\0') if name}
+    prefix = prefix.strip()
+
+    changed_files = {Path(name[len(prefix):]) for name in changed_paths
+                     if name.startswith(prefix) and _is_version_file_name(os.path.basename(name))}
+
+    if changed_paths:
+        repository = os.getenv('GITHUB_REPOSITORY')
+        candidates = git_ls_version_files()
+        if candidates is None:
+            candidates = find_version_files(skip_dir=matcher.excludes_subtree if matcher is not None else None)
+        for f in sorted(candidates):
+            if f in changed_files or (matcher is not None and matcher.matches(f)):
+                continue
+            if _remote_target(f, repository) in changed_paths:
+                log.debug('The remote version file of %s changed', f)
+                changed_files.add(f)
+
+    return {f for f in changed_files if f.is_file()}
+
+
+def _remote_target(f: Path, repository: Optional[str]) -> Optional[str]:
+    # The path of the file the URL of the version file points to, if it's part of this repository.
+    try:
+        with f.open('r') as vf:
+            url = json.loads(vf.read()).get('URL')
+    except (OSError, ValueError, AttributeError):
+        return None
+    if not isinstance(url, str):
+        return None
+    if (location := get_repository_location(url)) is None:
+        return None
+    (repo, path) = location
+    if repository and repo.lower() != repository.lower():
+        return None
+    return path
+
+
+def _run_git(*args) -> Optional[str]:
+    try:
+        return subprocess.run(['git', *args], capture_output=True, check=True, text=True).stdout
+    except (OSError, subprocess.CalledProcessError) as e:
+        log.debug(f'Running git {" ".join(args)} failed: {e}')
+        return None
+
 
-        for _glob in globs:
-            all_exclusions = all_exclusions.union(Path().glob(_glob))
-    return all_exclusions
+def _is_version_file_name(name: str) -> bool:
+    # Same as Path(name).suffix.lower() == '.version', which is empty for a file just called '.version'.
+    return len(name) > len('.version') and name.lower().endswith('.version')
 
 
 def get_schema():
+    import requests
+
     log.debug('Fetching schema...')
     try:
-        return requests.get(
-            'https://github.com/linuxgurugamer/KSPAddonVersionChecker/raw/master/KSP-AVC.schema.json'
-        ).json()
+        return json.loads(fetch_text(SCHEMA_URL))
+    except requests.exceptions.RequestException as e:
+        log.error(f'Failed downloading the schema: {e}')
+        return None
     except ValueError:
         log.error('Current schema not valid JSON, that\'s unfortunate...')
         return None
 
 
 def get_build_map():
+    import requests
+
     log.debug('Fetching build map...')
     try:
-        return requests.get('https://github.com/KSP-CKAN/CKAN-meta/raw/master/builds.json').json()
+        return json.loads(fetch_text(BUILD_MAP_URL))
     except requests.exceptions.RequestException:
         log.debug('Failed downloading build map from the CKAN-meta repository.')
     except ValueError:
@@ -142,19 +354,231 @@ def get_build_map():
     return None
 
 
+def get_latest_ksp_version() -> Optional[KspVersion]:
+    """Returns the latest KSP version from the build map, without building a dict of the whole build map."""
+    import requests
+
+    log.debug('Fetching build map...')
+    try:
+        text = fetch_text(BUILD_MAP_URL)
+    except requests.exceptions.RequestException:
+        log.debug('Failed downloading build map from the CKAN-meta repository.')
+        return None
+    return parse_latest_ksp_version(text)
+
+
+def parse_latest_ksp_version(text: str) -> Optional[KspVersion]:
+    """Extracts the latest KSP version from the text of the build map, only parsing all of it if it has to."""
+    # The builds are sorted, the latest one is the last entry of the "builds" object: {"builds": {..., "id": "x.y.z"}}
+    # The versions don't contain braces, so the first one after its key closes the object.
+    if (start := text.find('"builds"')) != -1 and (end := text.find('}', start)) != -1:
+        last_value = text[start:end].rsplit(':', 1)[-1].strip().strip('"')
+        if (version := KspVersion.try_parse(last_value)) is not None:
+            return version
+
+    log.debug('Unexpected build map format, parsing all of it')
+    try:
+        return latest_ksp_version_of(json.loads(text))
+    except (ValueError, TypeError, AttributeError):
+        log.debug('Current build map is not valid JSON, that\'s unfortunate...')
+        return None
+
+
+def latest_ksp_version_of(build_map) -> Optional[KspVersion]:
+    if builds := build_map.get('builds', None):
+        return KspVersion(next(reversed(builds.values())))
+    return None
+
+
+class LatestKspVersion:
+    """Provides the latest KSP version, but only downloads the build map when it's asked for it the first time."""
+
+    def __init__(self, pinned: KspVersion = None, build_map=None):
+        """
+        :param pinned: Use this version instead of the latest one from the build map.
+        :param build_map: A **valid** Python object representing the build map. Use sparingly, intended for tests!
+        """
+        self._version = pinned
+        if pinned is None and build_map is not None:
+            self._version = latest_ksp_version_of(build_map)
+        self._resolved = self._version is not None
+
+    @classmethod
+    def fixed(cls, version: Optional[KspVersion]):
+        """A provider that never downloads anything. If version is None, compatibility isn't checked at all."""
+        provider = cls(version)
+        provider._resolved = True
+        return provider
+
+    def get(self) -> Optional[KspVersion]:
+        if not self._resolved:
+            with timing.phase('build_map'):
+                self._version = get_latest_ksp_version()
+            self._resolved = True
+        return self._version
+
+
+# Runs in a worker thread, ahead of check_single_file(). Loads and validates the file, and only downloads the remote of
+# a valid one. Loading errors are re-raised by Future.result(), the remote's are returned to tell them apart.
+def _prefetch(f: Path, schema_validator, remote_cache: RemoteCache = None) \
+        -> Tuple[VersionFile, Optional[VersionFile], Optional[Exception]]:
+    import jsonschema
+
+    with f.open('r') as vf:
+        version_file = VersionFile(vf.read(), f, compact=True, positions=True)
+    try:
+        with timing.phase('local_validation'):
+            version_file.validate(schema_validator, False)
+    except jsonschema.ValidationError:
+        return version_file, None, None
+    try:
+        return version_file, version_file.get_remote(remote_cache), None
+    except Exception as e:
+        return version_file, None, e
+
+
+def _check_in_processes(files: List[Path], schema: dict, latest_ksp: 'LatestKspVersion', processes: int,
+                        max_workers: int, all_errors=False) -> Iterator[tuple]:
+    """Checks the files in a process pool and yields (file, valid, log records, remote status) in the given order.
+
+    The files are split into a few chunks per process, so the workers don't wait for each other's slow remotes.
+    The workers use the same caches, and send what they added to the remote cache back with each chunk, together
+    with their timings. If the latest KSP version isn't known yet, each worker looks it up once it needs it.
+    Records logged while downloading aren't part of any file, they are emitted before the files of their chunk.
+    """
+    # Pulls in multiprocessing, which most runs don't need.
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunk_size = max(1, math.ceil(len(files) / (processes * CHUNKS_PER_PROCESS)))
+    chunks = [files[i:i + chunk_size] for i in range(0, len(files), chunk_size)]
+    remote_results = get_remote_results()
+    initargs = (schema, latest_ksp, log.getLogger().getEffectiveLevel(), http.get_settings(), cache.get_settings(),
+                results.get_results() is not None, timing.get_timings() is not None)
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=initargs) as pool:
+        futures = [pool.submit(_check_chunk, chunk, max_workers, all_errors) for chunk in chunks]
+        for future in futures:
+            (checked, download_records, remote_updates, timings) = future.result()
+            _emit_records(download_records)
+            if remote_results is not None:
+                remote_results.update(remote_updates)
+            if timings is not None and timing.get_timings() is not None:
+                timing.get_timings().merge(*timings)
+            yield from checked
+
+
+def _emit_checked(f: Path, valid: bool, records: List[log.LogRecord], remote_status: Optional[str]) -> bool:
+    _emit_records(records)
+    if remote_status is not None:
+        results.set_remote_status(f, remote_status)
+    return valid
+
+
+def _emit_records(records: List[log.LogRecord]):
+    # Runs on the calling thread, so the handlers of the incremental mode pick the records up as their own.
+    for record in records:
+        record.thread = threading.get_ident()
+        record.threadName = threading.current_thread().name
+        log.getLogger(record.name).handle(record)
+
+
+# State of a worker process of _check_in_processes(), set up by _init_worker().
+_worker_schema_validator = None
+_worker_latest_ksp: Optional[LatestKspVersion] = None
+_worker_records: List[log.LogRecord] = []
+# Records of the download threads, which don't belong to the file being checked.
+_worker_download_records: List[log.LogRecord] = []
+
+
+class _WorkerRecordCollector(log.Handler):
+    # Like _RecordCollector, only the records of the thread checking the files belong to them.
+
+    def __init__(self):
+        super().__init__()
+        self.thread = threading.get_ident()
+
+    def emit(self, record):
+        # Make it picklable, the arguments and exceptions can't always be sent to the parent.
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        (_worker_records if record.thread == self.thread else _worker_download_records).append(record)
+
+
+def _init_worker(schema: dict, latest_ksp: LatestKspVersion, level: int, http_settings: dict, cache_settings: dict,
+                 collect_results: bool, collect_timings: bool):
+    global _worker_schema_validator, _worker_latest_ksp
+    root_logger = log.getLogger()
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+    # Before anything logs, without a handler logging would add one for stderr.
+    root_logger.addHandler(_WorkerRecordCollector())
+    root_logger.setLevel(level)
+    # Connections of the parent can't be shared, the worker needs its own.
+    http.setup_http(**http_settings)
+    # The remote cache is only read here, the parent saves it.
+    cache.setup_cache(**cache_settings)
+    if collect_results:
+        # Only for the remote statuses, the messages are collected from the emitted records in the parent.
+        results.setup_results()
+        root_logger.removeHandler(results.get_results())
+    timing.setup_timing(collect_timings)
+    _worker_schema_validator = compile_schema(schema)
+    _worker_latest_ksp = latest_ksp
+
+
+def _check_chunk(files: List[Path], max_workers: int, all_errors: bool) -> Tuple[List[tuple], list, dict, tuple]:
+    checked = []
+    # Also drops what the setup in _init_worker() logged, the parent logged the same already.
+    _worker_download_records.clear()
+    remote_results = get_remote_results()
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        remote_cache = RemoteCache(compact=True, results=remote_results, schema_validator=_worker_schema_validator)
+        remotes = {f: executor.submit(_prefetch, f, _worker_schema_validator, remote_cache) for f in files}
+        for f in files:
+            _worker_records.clear()
+            with timing.file(f):
+                valid = check_single_file(f, _worker_schema_validator, _worker_latest_ksp, remotes[f], all_errors)
+            remote_status = results.get_results().remotes.get(str(f)) if results.get_results() else None
+            checked.append((f, valid, list(_worker_records), remote_status))
+
+    timings = None
+    if (worker_timings := timing.get_timings()) is not None:
+        timings = (worker_timings.phases, worker_timings.files, worker_timings.downloads)
+        # Only what's new is sent with the next chunk.
+        timing.setup_timing()
+    remote_updates = remote_results.take_updates() if remote_results is not None else {}
+    return checked, list(_worker_download_records), remote_updates, timings
+
+
 # Returns a bool to indicate whether the file and its remote is valid or not.
-def check_single_file(f: Path, schema, latest_ksp):
-    log.info(f'Checking {f}')
+# schema_validator should come from compile_schema(), a plain schema dict works too but is compiled every time.
+# latest_ksp can be a KspVersion, None, or a LatestKspVersion that is only asked if the file needs it.
+# If prefetched is given, the file and its remote are taken from that future of _prefetch() instead of loading them.
+# With all_errors, every schema error of the file and its remote is logged, not only the most relevant one.
+def check_single_file(f: Path, schema_validator, latest_ksp, prefetched: Future = None, all_errors=False):
+    import jsonschema
+    import requests
+
+    if not isinstance(latest_ksp, LatestKspVersion):
+        latest_ksp = LatestKspVersion.fixed(latest_ksp)
+    log.info('Checking %s', f)
     log_extra = LogExtra(f)
 
     # Primary version file validation
+    (remote, remote_error) = (None, None)
     try:
-        with f.open('r') as vf:
-            log.debug(f'Loading {f}')
-            version_file = VersionFile(vf.read(), f)
+        if prefetched is not None:
+            # Mostly waiting for the download of the remote, which runs in the background.
+            with timing.phase('remote'):
+                (version_file, remote, remote_error) = prefetched.result()
+        else:
+            with f.open('r') as vf:
+                log.debug('Loading %s', f)
+                version_file = VersionFile(vf.read(), f, compact=True, positions=True)
 
-        log.debug(f'Validating {f}')
-        version_file.validate(schema, False)
+        log.debug('Validating %s', f)
+        with timing.phase('local_validation'):
+            version_file.validate(schema_validator, False)
 
     except json.decoder.JSONDecodeError as e:
         log_extra.line = e.lineno
@@ -164,13 +588,16 @@ def check_single_file(f: Path, schema, latest_ksp):
         return False
 
     except jsonschema.ValidationError as e:
-        log.error(f'Validation of {f} failed: {e}', extra=log_extra.asdict())
+        for error in (version_file.validation_errors if all_errors else [e]):
+            error_extra = LogExtra(f, *(version_file.position_of(error.absolute_path) or ()))
+            log.error(f'Validation of {f} failed: {error}', extra=error_extra.asdict())
         return False
 
     # Secondary compatibility soft-checks
-    if latest_ksp is not None and not version_file.is_compatible_with_ksp(latest_ksp):
+    if not version_file.is_compatible_with_any_ksp() and (latest := latest_ksp.get()) is not None \
+            and not version_file.is_compatible_with_ksp(latest):
         log.warning(f"The file {f} doesn't indicate compatibility "
-                    f"with the latest version of KSP ({str(latest_ksp)}). "
+                    f"with the latest version of KSP ({str(latest)}). "
                     f"Did you forget to update it?", extra=log_extra.asdict())
 
     vmin = version_file.ksp_version_min
@@ -195,20 +622,31 @@ def check_single_file(f: Path, schema, latest_ksp):
 
     # Remote version file validation and compatibility checks
     try:
-        log.info(f'Checking remote of {f}')
-        if remote := version_file.get_remote():
-            remote.validate(schema)
-            if latest_ksp is not None and not remote.is_compatible_with_ksp(latest_ksp):
+        log.info('Checking remote of %s', f)
+        if remote_error is not None:
+            raise remote_error
+        if prefetched is None:
+            with timing.phase('remote'):
+                remote = version_file.get_remote()
+        if remote:
+            remote.validate(schema_validator)
+            results.set_remote_status(f, results.REMOTE_VALID)
+            if not remote.is_compatible_with_any_ksp() and (latest := latest_ksp.get()) is not None \
+                    and not remote.is_compatible_with_ksp(latest):
                 log.warning(f"The remote version file of {f} doesn't indicate compatibility "
-                            f"with the latest version of KSP ({str(latest_ksp)}). "
+                            f"with the latest version of KSP ({str(latest)}). "
                             f"Did you forget to update it? {version_file.url}", extra=log_extra.asdict())
+        else:
+            results.set_remote_status(f, results.REMOTE_NONE)
 
     except requests.exceptions.RequestException:
+        results.set_remote_status(f, results.REMOTE_DOWNLOAD_FAILED)
         log.warning(f'Failed downloading remote version file at {version_file.url}. '
                     f'Note that the URL property, when used, '
                     f'must point to the "Location of a remote version file for update checking"',
                     extra=log_extra.asdict())
     except json.decoder.JSONDecodeError as e:
+        results.set_remote_status(f, results.REMOTE_INVALID_JSON)
         log_extra.line = e.lineno
         log_extra.col = e.colno
         log.warning(f'Failed loading remote version file at {version_file.url}. '
@@ -216,10 +654,12 @@ def check_single_file(f: Path, schema, latest_ksp):
                     f'must point to the "Location of a remote version file for update checking". '
                     f'Check for a syntax error around the mentioned line: {e}', extra=log_extra.asdict())
     except jsonschema.ValidationError as e:
-        log.warning(f'Validation failed for remote version file at {version_file.url}. '
-                    f'Note that the URL property, when used, '
-                    f'must point to the "Location of a remote version file for update checking": {e}',
-                    extra=log_extra.asdict())
-
-    log.debug(f'Validation of {f} successful.')
+        results.set_remote_status(f, results.REMOTE_INVALID)
+        for error in (remote.validation_errors if all_errors else [e]):
+            log.warning(f'Validation failed for remote version file at {version_file.url}. '
+                        f'Note that the URL property, when used, '
+                        f'must point to the "Location of a remote version file for update checking": {error}',
+                        extra=log_extra.asdict())
+
+    log.debug('Validation of %s successful.', f)
     return True
@@ -1,89 +1,322 @@
 import json
 import logging as log
 import re
+import threading
+from concurrent.futures import Future
 from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Tuple
+from urllib.parse import urlparse, urlunparse
 
-import jsonschema
-import requests
-
+from . import http
 from .ksp_version import KspVersion
+from .positions import Position, find as find_position, loads as loads_with_positions, pointer
+from .utils import hash_json
+
+if TYPE_CHECKING:
+    from .cache import RemoteResultCache
+
+
+def _field(key: str) -> property:
+    return property(lambda self: self._get(key), doc=f'{key} of the version file, None if it is missing.')
 
 
 class VersionFile:
+    """A parsed version file, whose properties are only looked up in the JSON when they are asked for.
+
+    The text itself isn't kept. With compact=True, the JSON is released as well once the file is validated,
+    only the path, the URL, the KSP versions and the validation result are kept. That's all the checks need,
+    so many version files can be kept around, like the remotes in a RemoteCache.
+    With positions=True, the line and column of every value are found while parsing, see position_of().
+    """
+
+    __slots__ = ('path', 'url', 'valid', 'compact', '_json', '_positions', '_ksp_versions', '_remote',
+                 '_validated_with', '_validation_error', '_validation_errors')
 
-    def __init__(self, content: str, path: Path):
+    def __init__(self, content: str, path: Path, compact=False, positions=False):
+        """
+        :param content: The text of the version file.
+        :param path: The path of the version file, or of the local version file for remote ones.
+        :param compact: Release the JSON after the first validation, see the class documentation.
+        :param positions: Remember where each value is, to point to the place of validation errors.
+        :raises json.decoder.JSONDecodeError: If the content isn't valid JSON.
+        """
+        if positions:
+            (self._json, self._positions) = loads_with_positions(content)
+        else:
+            self._json = json.loads(content)
+            self._positions = None
+        self.url = self._json.get('URL')
+        self.path = path
+        self.compact = compact
+        # Parsed on first access, all three together as the checks always need all of them.
+        self._ksp_versions = None
+
+        self._remote = None
+        self._validated_with = None
+        self._validation_error = None
+        # All errors of the last validation, only kept for invalid files.
+        self._validation_errors = None
+        self.valid = False
 
-        self.json = json.loads(content)
-        self.raw = content
+    name = _field('NAME')
+    download = _field('DOWNLOAD')
+    changelog = _field('CHANGE_LOG')
+    changelog_url = _field('CHANGE_LOG_URL')
+    disallow_version_override = _field('DISALLOW_VERSION_OVERRIDE')
+    kerbalstuff_url = _field('KERBAL_STUFF_URL')
+    assembly_name = _field('ASSEMBLY_NAME')
+    ksp_version_include = _field('KSP_VERSION_INCLUDE')
+    ksp_version_exclude = _field('KSP_VERSION_EXCLUDE')
+    local_has_priority = _field('LOCAL_HAS_PRIORITY')
+    remote_has_priority = _field('REMOTE_HAS_PRIORITY')
+    version = _field('VERSION')
+    # I doubt we will ever have to deal with it, so we don't care about INSTALL_LOC* for now.
 
-        self.name = self.json.get('NAME')
-        self.url = self.json.get('URL')
-        self.download = self.json.get('DOWNLOAD')
-        self.changelog = self.json.get('CHANGE_LOG')
-        self.changelog_url = self.json.get('CHANGE_LOG_URL')
+    @property
+    def json(self):
+        return self._get(None)
 
-        if gh := self.json.get('GITHUB'):
-            self.github = True
-            self.github_username = gh.get('USERNAME')
-            self.github_repository = gh.get('REPOSITORY')
-            self.github_allow_prerelease = gh.get('ALLOW_PRE_RELEASE')
+    @property
+    def github(self) -> bool:
+        return bool(self._get('GITHUB'))
 
-        self.disallow_version_override = self.json.get('DISALLOW_VERSION_OVERRIDE')
-        self.kerbalstuff_url = self.json.get('KERBAL_STUFF_URL')
-        self.assembly_name = self.json.get('ASSEMBLY_NAME')
-        self.ksp_version_include = self.json.get('KSP_VERSION_INCLUDE')
-        self.ksp_version_include = self.json.get('KSP_VERSION_INCLUDE')
-        self.ksp_version_exclude = self.json.get('KSP_VERSION_EXCLUDE')
-        self.local_has_priority = self.json.get('LOCAL_HAS_PRIORITY')
-        self.remote_has_priority = self.json.get('REMOTE_HAS_PRIORITY')
+    @property
+    def github_username(self):
+        return (self._get('GITHUB') or {}).get('USERNAME')
 
-        self.version = self.json.get('VERSION')
+    @property
+    def github_repository(self):
+        return (self._get('GITHUB') or {}).get('REPOSITORY')
 
-        self.ksp_version = KspVersion.try_parse(v) if (v := self.json.get('KSP_VERSION')) is not None else None
-        self.ksp_version_min = KspVersion.try_parse(v) if (v := self.json.get('KSP_VERSION_MIN')) is not None else None
-        self.ksp_version_max = KspVersion.try_parse(v) if (v := self.json.get('KSP_VERSION_MAX')) is not None else None
+    @property
+    def github_allow_prerelease(self):
+        return (self._get('GITHUB') or {}).get('ALLOW_PRE_RELEASE')
 
-        # I doubt we will ever have to deal with it, so we don't care about INSTALL_LOC* for now.
+    @property
+    def ksp_version(self) -> Optional[KspVersion]:
+        return self._get_ksp_versions()[0]
 
-        self._remote = None
+    @property
+    def ksp_version_min(self) -> Optional[KspVersion]:
+        return self._get_ksp_versions()[1]
+
+    @property
+    def ksp_version_max(self) -> Optional[KspVersion]:
+        return self._get_ksp_versions()[2]
+
+    # The whole JSON for key None.
+    def _get(self, key: Optional[str]):
+        if self._json is None:
+            raise AttributeError(f'The JSON of the compact version file {self.path} has been released, '
+                                 f'only the URL and the KSP versions are kept')
+        return self._json if key is None else self._json.get(key)
+
+    def _get_ksp_versions(self) -> Tuple[Optional[KspVersion], Optional[KspVersion], Optional[KspVersion]]:
+        if (versions := self._ksp_versions) is None:
+            instance = self._json
+            if instance is None:
+                # Released by another thread in the meantime, which parsed them before.
+                return self._ksp_versions
+            versions = self._ksp_versions = tuple(
+                KspVersion.try_parse(v) if (v := instance.get(key)) is not None else None
+                for key in ('KSP_VERSION', 'KSP_VERSION_MIN', 'KSP_VERSION_MAX'))
+        return versions
+
+    # The KSP versions are parsed first, so they are always there once the JSON is gone.
+    # The positions are only still needed to point to the validation error.
+    def _release(self):
+        self._get_ksp_versions()
+        self._json = None
+        if self._validation_error is None:
+            self._positions = None
+
+    def assume_validated(self, schema_validator, error: Optional['jsonschema.ValidationError'],
+                         errors: List['jsonschema.ValidationError'] = ()):
+        """Takes the result of validating the same content with schema_validator before, instead of validating it.
+
+        :param error: The error validate() raised, None if it was valid.
+        :param errors: The validation_errors, with their paths.
+        """
+        if error is not None:
+            self._validation_error = error
+            self._validation_errors = list(errors) or None
+        else:
+            (self._validation_error, self._validation_errors) = (None, None)
+        self._validated_with = schema_validator
         self.valid = False
-        self.path = path
+        if self.compact:
+            self._release()
+
+    @property
+    def validation_errors(self) -> List['jsonschema.ValidationError']:
+        """All mistakes found by the last validate(), instead of only the one it raises. Empty if it was valid.
+
+        For each failed rule, the most relevant error is taken, like the one validate() raises. For a value that
+        matches none of several alternatives, that's the one of the closest alternative.
+        Sorted by their position in the file (or their path, without positions), and each rule is only reported
+        once for the same value.
+        """
+        import jsonschema
+
+        errors = {}
+        for error in map(jsonschema.exceptions.best_match, ([e] for e in self._validation_errors or [])):
+            key = (pointer(error.absolute_path), tuple(map(str, error.absolute_schema_path)), error.message)
+            errors.setdefault(key, error)
+        return sorted(errors.values(), key=lambda error: (self.position_of(error.absolute_path) or (0, 0),
+                                                            pointer(error.absolute_path)))
+
+    def position_of(self, path) -> Optional[Position]:
+        """Returns the (line, col) of the value at the given path, like the absolute_path of a ValidationError.
+
+        For paths that don't exist, like missing properties, the position of the closest parent is returned.
+        None if the version file wasn't created with positions=True.
+        """
+        if not self._positions:
+            return None
+        return find_position(self._positions, path)
 
-    def get_remote(self):
+    # Pass a RemoteCache to share the download with other version files that have the same URL.
+    def get_remote(self, remote_cache: 'RemoteCache' = None):
         if self._remote:
             return self._remote
         if not self.url:
             return None
-        log.debug('Fetching remote...')
-        response = requests.get(get_raw_uri(self.url))
-        response.raise_for_status()
-        self._remote = VersionFile(response.text, self.path)
+        if remote_cache is not None:
+            self._remote = remote_cache.get(self.url, self.path)
+        else:
+            self._remote = download_version_file(get_raw_uri(self.url), self.path, self.compact)
         return self._remote
 
     # Validates this and optional a remote version file. Throws all exception it encounters.
-    def validate(self, schema: dict, validate_remote=False):
-        self.valid = False
-        jsonschema.validate(self.json, schema)
+    # Pass a validator from compile_schema() (or anything else with iter_errors()) to avoid compiling it every time.
+    # The result is remembered, validating the same instance again with the same validator (or schema) is free.
+    # Compact version files can't be validated with anything else afterwards.
+    def validate(self, schema_validator, validate_remote=False):
+        import jsonschema
+
+        if self._validated_with is not schema_validator:
+            self.valid = False
+            # Read only once, another thread validating the same remote could release it in the meantime.
+            instance = self._json
+            if instance is not None:
+                # Same as jsonschema.validate(), but without checking the schema itself again.
+                # best_match() looks at all errors anyway, so they are kept for validation_errors.
+                errors = list(compile_schema(schema_validator).iter_errors(instance))
+                self._validation_error = jsonschema.exceptions.best_match(errors)
+                self._validation_errors = errors or None
+                self._validated_with = schema_validator
+                if self.compact:
+                    self._release()
+            elif self._validated_with is not schema_validator:
+                raise ValueError(f'The compact version file {self.path} has already been validated with another '
+                                 f'schema and released its JSON')
+        if self._validation_error is not None:
+            self.valid = False
+            raise self._validation_error
 
         if not validate_remote:
             self.valid = True
             return
 
         remote = self.get_remote()
-        remote.validate(schema, False)
+        remote.validate(schema_validator, False)
         # No exceptions -> True
         self.valid = True
 
+    # True if KSP_VERSION, KSP_VERSION_MIN or KSP_VERSION_MAX is 'any', no need to know which KSP versions exist then.
+    def is_compatible_with_any_ksp(self) -> bool:
+        return any(getattr(v, 'any', False) for v in (self.ksp_version, self.ksp_version_min, self.ksp_version_max))
+
     def is_compatible_with_ksp(self, version: KspVersion) -> bool:
         if version is None:
             return False
         return version.is_contained_in(self.ksp_version, self.ksp_version_min, self.ksp_version_max)
 
 
+class RemoteCache:
+    """Downloads and parses every remote version file only once per run, even if many version files point to it.
+
+    Entries are keyed on the raw URI. If several threads ask for the same one at the same time, only the first one
+    downloads it, the others wait for its result. Failed downloads are remembered as well.
+    """
+
+    def __init__(self, compact=False, results: 'RemoteResultCache' = None, schema_validator=None):
+        """
+        :param compact: Create compact version files, that release their JSON once validated.
+        :param results: Remember the remotes across runs in this cache, and reuse their results from earlier runs.
+                        They are validated with schema_validator right away then, and always compact.
+        :param schema_validator: The validator from compile_schema() the remotes are validated with, needed for results.
+        """
+        self._futures = {}
+        self._lock = threading.Lock()
+        self.compact = compact
+        self.results = results if schema_validator is not None else None
+        self.schema_validator = schema_validator
+        self._schema_hash = hash_json(schema_validator.schema) if self.results is not None else None
+
+    def get(self, url: str, path: Path) -> VersionFile:
+        raw_uri = get_raw_uri(url)
+        with self._lock:
+            future = self._futures.get(raw_uri)
+            is_new = future is None
+            if is_new:
+                future = self._futures[raw_uri] = Future()
+
+        if not is_new:
+            log.debug('Remote cache hit for %s', raw_uri)
+            return future.result()
+
+        log.debug('Remote cache miss for %s', raw_uri)
+        try:
+            if self.results is not None:
+                future.set_result(self.results.fetch(raw_uri, path, self.schema_validator, self._schema_hash))
+            else:
+                future.set_result(download_version_file(raw_uri, path, self.compact))
+        except Exception as e:
+            future.set_exception(e)
+        return future.result()
+
+
+def download_version_file(raw_uri: str, path: Path, compact=False) -> VersionFile:
+    """Downloads and parses the version file at the given raw URI.
+
+    :param raw_uri: The URI of the file, see get_raw_uri().
+    :param path: The path of the local version file that points to it.
+    :param compact: Create a compact version file, see VersionFile.
+    :raises requests.exceptions.RequestException: If the download failed, or in offline mode (OfflineCacheMiss).
+    :raises json.decoder.JSONDecodeError: If the downloaded file isn't valid JSON.
+    """
+    # The cache module imports this one.
+    from .cache import OfflineCacheMiss, is_offline
+    if is_offline():
+        raise OfflineCacheMiss(f'Remote version file {raw_uri} is not cached, can\'t download it in offline mode.')
+    log.debug('Fetching remote %s...', raw_uri)
+    response = http.get(raw_uri)
+    response.raise_for_status()
+    return VersionFile(response.text, path, compact)
+
+
+def compile_schema(schema: dict):
+    """Checks the schema against its metaschema and creates a validator that can be reused for many version files.
+
+    A validator created by an earlier call is returned as it is.
+
+    :raises jsonschema.SchemaError: If the schema itself is invalid.
+    """
+    if not isinstance(schema, dict):
+        return schema
+    # Imported here, it's slow to import and only needed once there's something to validate.
+    import jsonschema
+
+    cls = jsonschema.validators.validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema)
+
+
 def get_raw_uri(uri: str) -> str:
     # Returns (scheme, netloc, path, params, query, fragment) with the rule:
     # <scheme>://<netloc>/<path>;<params>?<query>#<fragment>
-    parts = requests.utils.urlparse(uri)
+    parts = urlparse(uri)
     if parts.netloc != 'github.com':
         return uri
 
@@ -100,4 +333,24 @@ def get_raw_uri(uri: str) -> str:
         log.warning("Don't put version files in paths containing 'blob' or 'tree', AVC will break the URL.")
 
     new_parts = (parts.scheme, parts.netloc, path_subst, parts.params, parts.query, parts.fragment)
-    return requests.utils.urlunparse(new_parts)
+    return urlunparse(new_parts)
+
+
+def get_repository_location(uri: str) -> Optional[Tuple[str, str]]:
+    """Returns the 'user/repo' name and the path inside the repository of a file hosted on GitHub.
+
+    Only URIs pointing to raw files, or that get_raw_uri() can convert to such, are supported.
+    Branch names containing slashes can't be told apart from the path and are not supported.
+
+    :return: A 2-tuple containing the repository name and the path, or None if it isn't a file hosted on GitHub.
+    """
+    parts = urlparse(get_raw_uri(uri))
+    if parts.netloc == 'github.com':
+        match = re.fullmatch('/(?P<repo>[^/]+/[^/]+)/raw/[^/]+/(?P<path>.+)', parts.path)
+    elif parts.netloc == 'raw.githubusercontent.com':
+        match = re.fullmatch('/(?P<repo>[^/]+/[^/]+)/[^/]+/(?P<path>.+)', parts.path)
+    else:
+        return None
+    if match is None:
+        return None
+    return match.group('repo'), match.group('path')